@@ -1,17 +1,23 @@
 from .astar import AStar
 from .bfs import BFS
+from .bidirectional import Bidirectional
 from .dfs import DFS
 from .dijkstra import Dijkstra
 from .gbfs import GBFS
+from .hdastar import HDAStar
+from .idastar import IDAStar
 from .swarm import AntColonyOptimization, Swarm, SwarmBidirectional, SwarmConvergent
 from .ucs import UCS
 
 __all__ = [
     "AStar",
     "BFS",
+    "Bidirectional",
     "DFS",
     "Dijkstra",
     "GBFS",
+    "HDAStar",
+    "IDAStar",
     "AntColonyOptimization",
     "Swarm",
     "SwarmBidirectional",
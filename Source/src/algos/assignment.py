@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .context import LevelContext
+    from .search import StonesPos
+
+INF = float("inf")
+
+
+class Assignment:
+    """Optimal stone -> goal assignment of one stone set with its dual potentials.
+
+    Rows are stones, columns are goals. `rows[i]` is the (cell, weight) of stone
+    i, `owner[j]` the row assigned to goal j (1-based, 0 if free), `u`/`v` the
+    row and column potentials keeping every reduced cost non-negative."""
+
+    __slots__ = ("cost", "owner", "rows", "u", "v")
+
+    def __init__(
+        self,
+        rows: list[tuple[int, int]],
+        owner: list[int],
+        u: list[float],
+        v: list[float],
+        cost: float,
+    ):
+        self.rows = rows
+        self.owner = owner
+        self.u = u
+        self.v = v
+        self.cost = cost
+
+
+class IncrementalHungarian:
+    """Hungarian heuristic over push distances that reuses the parent's solution.
+
+    A child differs from its parent by at most one stone. Its assignment is the
+    parent's with that stone's row freed, its potential lowered back to feasible
+    and a single shortest augmenting path to re-insert it: O(n^2) instead of
+    solving the O(n^3) problem again. Solutions are kept in a bounded side table
+    keyed by stone set, oldest out first."""
+
+    def __init__(self, ctx: LevelContext, capacity: int = 1 << 16):
+        self.ctx = ctx
+        self.dists = ctx.push_distances
+        self.capacity = capacity
+
+        self.solutions: dict[StonesPos, Assignment] = {}
+        self.solved = 0
+        self.repaired = 0
+
+    def rows_of(self, stones_pos: StonesPos):
+        num_col = self.ctx.num_col
+        return sorted((x * num_col + y, w) for x, y, w in stones_pos)
+
+    def evaluate(self, stones_pos: StonesPos) -> float:
+        return self.solution(stones_pos).cost
+
+    def evaluate_child(self, parent_pos: StonesPos, child_pos: StonesPos) -> float:
+        parent = self.solution(parent_pos)
+        if child_pos == parent_pos:
+            return parent.cost
+
+        solution = self.solutions.get(child_pos)
+        if solution is not None:
+            return solution.cost
+
+        moved = child_pos - parent_pos
+        if len(moved) != 1 or len(parent.rows) != len(parent.v) - 1:
+            # several stones moved, or more goals than stones: free goals would
+            # have to keep zero potentials, solve from scratch
+            return self.solution(child_pos).cost
+
+        ((x, y, w),) = moved
+        (src,) = parent_pos - child_pos
+        src_cell = src[0] * self.ctx.num_col + src[1]
+
+        i = parent.rows.index((src_cell, src[2])) + 1
+        rows = parent.rows.copy()
+        rows[i - 1] = (x * self.ctx.num_col + y, w)
+
+        owner = parent.owner.copy()
+        owner[owner.index(i)] = 0
+        u = parent.u.copy()
+        v = parent.v.copy()
+
+        # lower the moved stone's potential until its reduced costs are non-negative
+        cell, w = rows[i - 1]
+        u[i] = min(w * self.dists[j - 1][cell] - v[j] for j in range(1, len(v)))
+
+        self.augment(rows, owner, u, v, i)
+        self.repaired += 1
+
+        return self.store(child_pos, rows, owner, u, v).cost
+
+    def solution(self, stones_pos: StonesPos) -> Assignment:
+        solution = self.solutions.get(stones_pos)
+        if solution is not None:
+            return solution
+
+        rows = self.rows_of(stones_pos)
+        num_goal = len(self.dists)
+
+        owner = [0] * (num_goal + 1)
+        u = [0.0] * (len(rows) + 1)
+        v = [0.0] * (num_goal + 1)
+        for i in range(1, len(rows) + 1):
+            self.augment(rows, owner, u, v, i)
+        self.solved += 1
+
+        return self.store(stones_pos, rows, owner, u, v)
+
+    def store(
+        self,
+        stones_pos: StonesPos,
+        rows: list[tuple[int, int]],
+        owner: list[int],
+        u: list[float],
+        v: list[float],
+    ):
+        dists = self.dists
+        cost = 0.0
+        for j in range(1, len(owner)):
+            if owner[j]:
+                cell, w = rows[owner[j] - 1]
+                cost += w * dists[j - 1][cell]
+
+        if len(self.solutions) >= self.capacity:
+            del self.solutions[next(iter(self.solutions))]
+
+        solution = Assignment(rows, owner, u, v, cost)
+        self.solutions[stones_pos] = solution
+        return solution
+
+    def augment(
+        self,
+        rows: list[tuple[int, int]],
+        owner: list[int],
+        u: list[float],
+        v: list[float],
+        i: int,
+    ):
+        # shortest augmenting path from free row i over reduced costs (e-maxx)
+        dists = self.dists
+        num_goal = len(owner) - 1
+
+        minv = [INF] * (num_goal + 1)
+        used = [False] * (num_goal + 1)
+        way = [0] * (num_goal + 1)
+
+        owner[0] = i
+        j0 = 0
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            cell, w = rows[i0 - 1]
+            ui0 = u[i0]
+
+            delta = INF
+            j1 = 0
+            for j in range(1, num_goal + 1):
+                if used[j]:
+                    continue
+
+                cur = w * dists[j - 1][cell] - ui0 - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+
+            for j in range(num_goal + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+
+            j0 = j1
+            if not owner[j0]:
+                break
+
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+
+        owner[0] = 0
@@ -1,18 +1,26 @@
 from __future__ import annotations
 
-import heapq
+from collections.abc import Callable
 
-import numpy as np
-from scipy.optimize import linear_sum_assignment
-
-from constants.enums import Direction
-from utils.base import manhattan
 from utils.metrics import profile
 
+from .queues import BucketOpenList
 from .search import Point, ProblemState, Search, StateHashTable, StonesPosFreeze
 
+type SolutionCallback = Callable[[str, int, float], None]
+
 
 class AStar(Search):
+    """A* over walk and push costs.
+
+    With epsilon > 1 states are ordered by g + epsilon * h (weighted A*): paths
+    are found much sooner and cost at most epsilon times the optimum. With
+    anytime set, the search keeps going after the first path as ARA*: epsilon is
+    lowered by epsilon_step after each pass and the next pass resumes from the
+    states of the last one, until a path is proven optimal. Every better path is
+    given to on_solution(path, weight, bound), bound being the factor it is
+    proven to be within of the optimum."""
+
     def __init__(
         self,
         num_row: int,
@@ -23,6 +31,11 @@ class AStar(Search):
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
         use_optimized: bool = True,
+        epsilon: float = 1.0,
+        anytime: bool = False,
+        epsilon_step: float = 0.5,
+        on_solution: SolutionCallback | None = None,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -33,82 +46,64 @@ class AStar(Search):
             switches_pos,
             use_deadlock=use_deadlock,
             use_weight=True,
+            **kwargs,
         )
 
         self.use_optimized = use_optimized
+        self.evaluator = self.make_heuristic(use_optimized)
+
+        self.epsilon = epsilon
+        self.anytime = anytime
+        self.epsilon_step = epsilon_step
+        self.on_solution = on_solution
 
         self.initial_state.gval = 0
         self.initial_state.fval = self.heuristic(frozenset(stones_pos), switches_pos)
 
+    def priority(self, state: ProblemState) -> float:
+        if self.epsilon == 1:
+            return state.fval
+        return state.gval + self.epsilon * (state.fval - state.gval)
+
     def handle(
         self,
         new_state: ProblemState,
         closed: set[ProblemState],
-        frontier: list[ProblemState],
+        frontier: BucketOpenList[ProblemState],
         state_hash_table: StateHashTable,
     ):
         id = hash(new_state)
 
         if new_state not in closed:
             closed.add(new_state)
-            heapq.heappush(frontier, new_state)
+            frontier.push(self.priority(new_state), new_state.gval, new_state)
             state_hash_table[id] = [new_state, True]
             return
 
-        if new_state.gval < state_hash_table[id][0].gval:
-            state_hash_table[id][0].fval = new_state.fval
-            state_hash_table[id][0].gval = new_state.gval
-            state_hash_table[id][0].ancestor = new_state.ancestor
-            state_hash_table[id][0].pushed_stone = new_state.pushed_stone
-
-            if not state_hash_table[id][1]:
-                state_hash_table[id][1] = True
-                heapq.heappush(frontier, new_state)
-
-    def heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        return (
-            self.hungarian_heuristic(stones_pos, switches_pos)
-            if self.use_optimized
-            else self.mahattan_heuristic(stones_pos, switches_pos)
-        )
-
-    def mahattan_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        sum = 0
-        for stone in stones_pos:
-            sum = sum + stone[2] * min(
-                [
-                    manhattan(stone[0], stone[1], switch[0], switch[1])
-                    for switch in switches_pos
-                ]
-            )
-        return sum
-
-    def hungarian_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        dists = np.zeros((len(stones_pos), len(switches_pos)))
+        state = state_hash_table[id][0]
+        if new_state.gval < state.gval:
+            state.fval = new_state.fval
+            state.gval = new_state.gval
+            state.ancestor = new_state.ancestor
+            state.pushed_stone = new_state.pushed_stone
 
-        for i, (sx, sy, w) in enumerate(stones_pos):
-            for j, (gx, gy) in enumerate(switches_pos):
-                dists[i, j] = w * manhattan(sx, sy, gx, gy)
-
-        row_ind, col_ind = linear_sum_assignment(dists)
-        return dists[row_ind, col_ind].sum()
+            # file it again under its new keys, the old entry is skipped when popped
+            state_hash_table[id][1] = True
+            frontier.push(self.priority(state), state.gval, state)
 
     @profile
     def search(self):
-        frontier: list[ProblemState] = []
-        heapq.heappush(frontier, self.initial_state)
+        self.budget.start()
+
+        if self.anytime:
+            return self.search_anytime()
+
+        frontier: BucketOpenList[ProblemState] = BucketOpenList()
+        frontier.push(
+            self.priority(self.initial_state),
+            self.initial_state.gval,
+            self.initial_state,
+        )
 
         closed: set[ProblemState] = set()
         closed.add(self.initial_state)
@@ -118,23 +113,170 @@ class AStar(Search):
 
         expanded_count = 0
         while frontier:
-            current_state = heapq.heappop(frontier)
+            fval, gval, current_state = frontier.pop()
+
+            # skip entries filed under outdated keys or already expanded
+            current_hash = hash(current_state)
+            state, in_frontier = state_hash_table[current_hash]
+            if (
+                state is not current_state
+                or not in_frontier
+                or (fval, gval) != (self.priority(state), state.gval)
+            ):
+                continue
+
             if current_state.is_final(self.switches_pos):
                 path, w = self.construct_path(current_state)
+                if self.on_solution:
+                    self.on_solution(path, w, self.epsilon)
                 return (path, w, expanded_count, len(closed))
 
-            # if this state is previously explored, then skip it
-            current_hash = hash(current_state)
-            if state_hash_table[current_hash][0] != current_state:
-                continue
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
 
             state_hash_table[current_hash][1] = False
 
             expanded_count += 1
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir, heuristic=self.heuristic)
-                    self.handle(new_state, closed, frontier, state_hash_table)
+            for new_state in self.successors_batch(current_state, self.heuristic_batch):
+                self.handle(new_state, closed, frontier, state_hash_table)
 
         return "Impossible", 0, expanded_count, len(closed)
+
+    def search_anytime(self):
+        frontier: BucketOpenList[ProblemState] = BucketOpenList()
+        frontier.push(
+            self.priority(self.initial_state),
+            self.initial_state.gval,
+            self.initial_state,
+        )
+
+        closed: set[ProblemState] = set()
+        closed.add(self.initial_state)
+
+        state_hash_table = {hash(self.initial_state): [self.initial_state, True]}
+
+        # states expanded during this pass, and those of them reached again more
+        # cheaply: they wait for the next pass instead of being expanded twice
+        expanded: set[int] = set()
+        inconsistent: dict[int, ProblemState] = {}
+
+        best: ProblemState | None = None
+        published = float("inf")
+        result = ("Impossible", 0)
+
+        expanded_count = 0
+        while True:
+            while frontier:
+                fval, gval, current_state = frontier.pop()
+
+                current_hash = hash(current_state)
+                state, in_frontier = state_hash_table[current_hash]
+                if (
+                    state is not current_state
+                    or not in_frontier
+                    or (fval, gval) != (self.priority(state), state.gval)
+                ):
+                    continue
+
+                # nothing left in this pass can lead to a cheaper path
+                if best is not None and fval >= best.gval:
+                    frontier.push(fval, gval, current_state)
+                    break
+
+                if self.budget.exhausted(expanded_count, len(closed)):
+                    # stop with the best path found so far, given to on_solution
+                    # first when this pass found it, the limit only without one
+                    if best is not None:
+                        path, w = self.construct_path(best)
+                        cost = len(path) - sum(map(str.isupper, path)) + w
+                        if cost < published:
+                            published = cost
+                            result = (path, w)
+                            if self.on_solution:
+                                self.on_solution(path, w, self.epsilon)
+
+                    if best is None:
+                        return self.budget.result(expanded_count, len(closed))
+                    return (*result, expanded_count, len(closed))
+
+                state_hash_table[current_hash][1] = False
+                if current_state.is_final(self.switches_pos):
+                    best = current_state
+                    continue
+
+                expanded.add(current_hash)
+                expanded_count += 1
+
+                for new_state in self.successors_batch(
+                    current_state, self.heuristic_batch
+                ):
+                    self.handle_anytime(
+                        new_state,
+                        closed,
+                        frontier,
+                        state_hash_table,
+                        expanded,
+                        inconsistent,
+                    )
+
+            if best is None:
+                return "Impossible", 0, expanded_count, len(closed)
+
+            # g + h of the states left to search bounds the optimal cost from below
+            pending = [
+                state for state, in_frontier in state_hash_table.values() if in_frontier
+            ]
+            lower = min(
+                (state.fval for state in (*pending, *inconsistent.values())),
+                default=best.gval,
+            )
+            # ancestors may have been reached more cheaply since, so the path can
+            # cost less than best.gval
+            path, w = self.construct_path(best)
+            cost = len(path) - sum(map(str.isupper, path)) + w
+            bound = min(self.epsilon, cost / lower) if lower > 0 else 1.0
+
+            if cost < published:
+                published = cost
+                result = (path, w)
+                if self.on_solution:
+                    self.on_solution(path, w, bound)
+
+            if bound <= 1:
+                return (*result, expanded_count, len(closed))
+
+            self.epsilon = max(self.epsilon - self.epsilon_step, 1.0)
+
+            # reorder the open states and the inconsistent ones for the next pass
+            frontier = BucketOpenList()
+            for state in pending:
+                frontier.push(self.priority(state), state.gval, state)
+            for id, state in inconsistent.items():
+                state_hash_table[id][1] = True
+                frontier.push(self.priority(state), state.gval, state)
+
+            expanded.clear()
+            inconsistent.clear()
+
+    def handle_anytime(
+        self,
+        new_state: ProblemState,
+        closed: set[ProblemState],
+        frontier: BucketOpenList[ProblemState],
+        state_hash_table: StateHashTable,
+        expanded: set[int],
+        inconsistent: dict[int, ProblemState],
+    ):
+        id = hash(new_state)
+        if new_state in closed and id in expanded:
+            state = state_hash_table[id][0]
+            if new_state.gval < state.gval:
+                state.fval = new_state.fval
+                state.gval = new_state.gval
+                state.ancestor = new_state.ancestor
+                state.pushed_stone = new_state.pushed_stone
+                inconsistent[id] = state
+            return
+
+        self.handle(new_state, closed, frontier, state_hash_table)
@@ -1,14 +1,33 @@
 from __future__ import annotations
 
+import os
+import tempfile
 from collections import deque
 
-from constants.enums import Direction
 from utils.metrics import profile
 
+from .external import (
+    merge_unique,
+    read_records,
+    record_struct,
+    subtract,
+    write_records,
+)
 from .search import Point, ProblemState, Search, StonesPos
 
 
 class BFS(Search):
+    """Breadth-first search, the first path found has the fewest steps.
+
+    With external set, the layers of the search are kept on disk instead of
+    memory: a state is packed as its player and stone cells, and every layer is a
+    file of such records in sorted order under work_dir (a temporary directory
+    by default). The children of a layer are sorted in runs of run_size records,
+    then merged and written as the next layer without the states of the layers
+    before it: the layers are the sorted runs of the states seen so far, so none
+    of them is rewritten. Only a run and a read buffer per file are in memory. The path is found again by going back layer by layer,
+    looking for a state of the previous layer that leads to the current one."""
+
     def __init__(
         self,
         num_row: int,
@@ -18,7 +37,16 @@ class BFS(Search):
         stones_pos: StonesPos,
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
+        external: bool = False,
+        work_dir: str | None = None,
+        run_size: int = 1 << 20,
+        **kwargs,
     ):
+        if external:
+            # records only hold positions, states are plain and weights ignored
+            kwargs.pop("use_bitboard", None)
+            kwargs.pop("use_weight", None)
+
         super().__init__(
             num_row,
             num_col,
@@ -27,32 +55,140 @@ class BFS(Search):
             stones_pos,
             switches_pos,
             use_deadlock=use_deadlock,
+            **kwargs,
+        )
+
+        self.external = external
+        self.work_dir = work_dir
+        self.run_size = run_size
+
+        # player cell then stone cells in ascending order
+        self.record = record_struct(len(stones_pos) + 1, num_row * num_col)
+
+    def pack(self, state: ProblemState) -> bytes:
+        cell = self.context.cell
+        return self.record.pack(
+            cell(state.player_pos), *sorted(cell(s[:2]) for s in state.stones_pos)
         )
 
+    def unpack(self, record: bytes) -> ProblemState:
+        points = self.context.points
+        player, *stones = self.record.unpack(record)
+        return self.hashed(
+            ProblemState(None, points[player], [(*points[c], 1) for c in stones])
+        )
+
+    def player_of(self, state: ProblemState) -> Point:
+        # a state read back from disk has no history, its player may stand
+        # anywhere in its region
+        if self.external and state.ancestor is None:
+            return state.player_pos
+        return super().player_of(state)
+
+    def write_run(self, directory: str, runs: list[str], records: set[bytes]):
+        runs.append(os.path.join(directory, f"run-{len(runs)}"))
+        write_records(runs[-1], sorted(records))
+        records.clear()
+
+    def external_path(self, layers: list[str], keys: list[bytes]):
+        # keys holds the goal and the states before it down to the last layer
+        # left, look up one state per layer leading to the one found so far
+        width = self.record.size
+        for layer in reversed(layers[: len(layers) + 1 - len(keys)]):
+            for record in read_records(layer, width):
+                state = self.unpack(record)
+                if any(self.pack(_) == keys[-1] for _ in self.successors(state)):
+                    keys.append(record)
+                    break
+
+        # replay the keys from the start to get back the pushed stones
+        state = self.initial_state
+        for key in reversed(keys[:-1]):
+            state = next(_ for _ in self.successors(state) if self.pack(_) == key)
+
+        return self.construct_path(state)
+
     @profile
     def search(self):
+        if self.external:
+            return self.search_external()
+
+        self.budget.start()
+
         frontier: deque[ProblemState] = deque()  # the FIFO queue
         frontier.append(self.initial_state)
 
-        closed: set[ProblemState] = set()
+        closed = self.closed_set()
         closed.add(self.initial_state)
 
         expanded_count = 0
         while frontier:
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
+
             expanded_count += 1
 
             current_state = frontier.popleft()
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir)
+            for new_state in self.successors(current_state):
+                if new_state.is_final(self.switches_pos):
+                    path, w = self.construct_path(new_state)
+                    return path, w, expanded_count, len(closed)
 
-                    if new_state.is_final(self.switches_pos):
-                        path, w = self.construct_path(new_state)
-                        return path, w, expanded_count, len(closed)
-
-                    if new_state not in closed:
-                        closed.add(new_state)
-                        frontier.append(new_state)
+                if new_state not in closed:
+                    closed.add(new_state)
+                    frontier.append(new_state)
 
         return "Impossible", 0, expanded_count, len(closed)
+
+    def search_external(self):
+        self.budget.start()
+
+        width = self.record.size
+
+        with tempfile.TemporaryDirectory(dir=self.work_dir) as directory:
+            layers = [os.path.join(directory, "layer-0")]
+            seen_count = write_records(layers[0], [self.pack(self.initial_state)])
+
+            expanded_count = 0
+            layer_count = 1
+            while layer_count:
+                runs: list[str] = []
+                children: set[bytes] = set()
+
+                for record in read_records(layers[-1], width):
+                    if self.budget.exhausted(expanded_count, seen_count):
+                        return self.budget.result(expanded_count, seen_count)
+
+                    expanded_count += 1
+
+                    current_state = self.unpack(record)
+                    for new_state in self.successors(current_state):
+                        key = self.pack(new_state)
+
+                        if new_state.is_final(self.switches_pos):
+                            path, w = self.external_path(layers, [key, record])
+                            return path, w, expanded_count, seen_count
+
+                        children.add(key)
+                        if len(children) >= self.run_size:
+                            self.write_run(directory, runs, children)
+
+                if children:
+                    self.write_run(directory, runs, children)
+
+                # next layer: the children never seen in the layers so far, it
+                # is one more sorted run of the seen states
+                seen = merge_unique(read_records(layer, width) for layer in layers)
+                layers.append(os.path.join(directory, f"layer-{len(layers)}"))
+                layer_count = write_records(
+                    layers[-1],
+                    subtract(
+                        merge_unique(read_records(run, width) for run in runs), seen
+                    ),
+                )
+                seen_count += layer_count
+                for run in runs:
+                    os.remove(run)
+
+            return "Impossible", 0, expanded_count, seen_count
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+from constants.enums import Direction
+from utils.metrics import profile
+
+from .bitboard import iter_bits
+from .push import goal_regions, opposite, pulls, reachable, walk_path
+from .search import Point, ProblemState, Search, StonesPosFreeze
+
+# (stone cells bitmask, lowest cell of the player region)
+type PositionKey = tuple[int, int]
+# key one pull nearer to a goal, cell the pushed stone comes from, direction index
+type PullRecord = tuple[PositionKey, int, int] | None
+
+
+class Bidirectional(Search):
+    """Breadth-first search over pushes from both ends at once.
+
+    The forward half pushes stones from the start, the backward half pulls them
+    from the goals with the player in any region it can end in. A layer is only
+    expanded on the side with the smaller frontier, and the search stops as soon
+    as a position is seen by both halves, so each of them only goes about half
+    the pushes deep. Stones are told apart by their weight only when the path is
+    replayed, so it is short in pushes but not the lightest one."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        matrix: list[list[str]],
+        player_pos: Point,
+        stones_pos: StonesPosFreeze,
+        switches_pos: frozenset[Point],
+        use_deadlock: bool = True,
+        **kwargs,
+    ):
+        kwargs.pop("use_push_level", None)
+        super().__init__(
+            num_row,
+            num_col,
+            matrix,
+            player_pos,
+            stones_pos,
+            switches_pos,
+            use_deadlock=use_deadlock,
+            use_push_level=True,
+            **kwargs,
+        )
+
+    def key_of(self, state: ProblemState) -> PositionKey:
+        return self.stones_cells(state), self.context.cell(state.player_pos)
+
+    def backward_roots(self) -> dict[PositionKey, PullRecord]:
+        goals = set(self.context.goal_cells)
+        mask = sum(1 << cell for cell in goals)
+
+        return {(mask, player): None for player in goal_regions(self.context, goals)}
+
+    def pull_successors(self, key: PositionKey):
+        mask, player = key
+        for stone, source, d, new_player in pulls(
+            self.context, set(iter_bits(mask)), player
+        ):
+            yield (mask ^ (1 << stone) ^ (1 << source), new_player), source, d
+
+    def construct_meeting_path(
+        self,
+        state: ProblemState,
+        key: PositionKey,
+        backward: dict[PositionKey, PullRecord],
+    ):
+        # pushes up to the meeting position, then the pulls of the backward half
+        # replayed as pushes from there down to the goals
+        ctx = self.context
+        pushings = [Direction.get_pushing(_) for _ in Direction]
+
+        path, tot_w = self.construct_push_path(state)
+
+        stones = {ctx.cell(s[:2]): s[2] for s in state.stones_pos}
+        player = ctx.cell(self.player_of(state))
+
+        record = backward[key]
+        while record:
+            key, source, d = record
+
+            push_from = ctx.neighbors[source][opposite(d)]
+            path += walk_path(reachable(ctx, stones, player), push_from)
+            path += pushings[d]
+
+            w = stones.pop(source)
+            stones[ctx.neighbors[source][d]] = w
+            tot_w += w
+
+            player = source
+            record = backward[key]
+
+        return path, tot_w
+
+    @profile
+    def search(self):
+        self.budget.start()
+
+        forward: dict[PositionKey, ProblemState] = {
+            self.key_of(self.initial_state): self.initial_state
+        }
+        backward = self.backward_roots()
+
+        forward_layer = [self.initial_state]
+        backward_layer = list(backward)
+
+        expanded_count = 0
+
+        key = self.key_of(self.initial_state)
+        if key in backward:
+            path, w = self.construct_meeting_path(self.initial_state, key, backward)
+            return path, w, expanded_count, len(forward) + len(backward)
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                next_forward: list[ProblemState] = []
+                for current_state in forward_layer:
+                    if self.budget.exhausted(
+                        expanded_count, len(forward) + len(backward)
+                    ):
+                        return self.budget.result(
+                            expanded_count, len(forward) + len(backward)
+                        )
+
+                    expanded_count += 1
+
+                    for new_state in self.successors(current_state):
+                        key = self.key_of(new_state)
+                        if key in forward:
+                            continue
+
+                        if key in backward:
+                            path, w = self.construct_meeting_path(
+                                new_state, key, backward
+                            )
+                            return path, w, expanded_count, len(forward) + len(backward)
+
+                        forward[key] = new_state
+                        next_forward.append(new_state)
+
+                forward_layer = next_forward
+            else:
+                next_backward: list[PositionKey] = []
+                for current_key in backward_layer:
+                    if self.budget.exhausted(
+                        expanded_count, len(forward) + len(backward)
+                    ):
+                        return self.budget.result(
+                            expanded_count, len(forward) + len(backward)
+                        )
+
+                    expanded_count += 1
+
+                    for key, source, d in self.pull_successors(current_key):
+                        if key in backward:
+                            continue
+
+                        backward[key] = (current_key, source, d)
+                        if key in forward:
+                            path, w = self.construct_meeting_path(
+                                forward[key], key, backward
+                            )
+                            return path, w, expanded_count, len(forward) + len(backward)
+
+                        next_backward.append(key)
+
+                backward_layer = next_backward
+
+        # one half ran out: no position links the start to the goals
+        return "Impossible", 0, expanded_count, len(forward) + len(backward)
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from constants.enums import Direction, GridItem
+
+if TYPE_CHECKING:
+    from .search import Point, Stone, StonesPos
+
+
+def iter_bits(mask: int):
+    # yield the indices of the set bits of mask in ascending order
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BoardIndex:
+    """Dense indices for the non-wall cells of a level.
+
+    Stones are encoded as an int bitmask over these indices plus a weight vector
+    ordered by ascending cell index, the player as a single cell index."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        matrix: list[list[str]],
+        switches_pos: frozenset[Point],
+    ):
+        wall = GridItem.get_char(GridItem.WALL)
+
+        self.cells: list[Point] = []
+        self.index: dict[Point, int] = {}
+        for x in range(num_row):
+            for y in range(num_col):
+                if matrix[x][y] != wall:
+                    self.index[(x, y)] = len(self.cells)
+                    self.cells.append((x, y))
+
+        self.size = len(self.cells)
+
+        # flat `x * num_col + y` cell of every dense index
+        self.flat = [x * num_col + y for x, y in self.cells]
+
+        # neighbors[idx][dir] is the cell index next to idx along dir, -1 if it's a wall
+        self.neighbors: list[tuple[int, ...]] = [
+            tuple(
+                self.index.get((x + dx, y + dy), -1)
+                for dx, dy in Direction.get_vec_list()
+            )
+            for x, y in self.cells
+        ]
+
+        self.goal_mask = self.encode_cells(switches_pos)
+
+    def encode_cells(self, cells_pos) -> int:
+        mask = 0
+        for pos in cells_pos:
+            mask |= 1 << self.index[(pos[0], pos[1])]
+        return mask
+
+    def encode_stones(self, stones_pos: StonesPos) -> tuple[int, tuple[int, ...]]:
+        ordered = sorted(stones_pos, key=lambda s: self.index[(s[0], s[1])])
+        return self.encode_cells(ordered), tuple(s[2] for s in ordered)
+
+    def decode_stones(self, mask: int, weights: tuple[int, ...]) -> frozenset[Stone]:
+        cells = self.cells
+        return frozenset((*cells[idx], w) for idx, w in zip(iter_bits(mask), weights))
+
+    @staticmethod
+    def rank(mask: int, idx: int):
+        # number of stones on cells below idx == position of idx in the weight vector
+        return (mask & ((1 << idx) - 1)).bit_count()
+
+    def move_stone(
+        self, mask: int, weights: tuple[int, ...], src: int, dst: int
+    ) -> tuple[int, tuple[int, ...], int]:
+        i = self.rank(mask, src)
+        w = weights[i]
+
+        new_mask = mask ^ (1 << src) ^ (1 << dst)
+        rest = weights[:i] + weights[i + 1 :]
+        j = self.rank(new_mask, dst)
+
+        return new_mask, rest[:j] + (w,) + rest[j:], w
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+
+from constants.enums import BudgetLimit
+
+
+class SearchBudget:
+    """Limits of a search: wall-clock seconds, expanded states, stored states
+    and traced memory in bytes, None for no limit.
+
+    Searches call start() once, then exhausted() once per expansion, or with the
+    number of expansions since the last call. Counts are compared on every call,
+    the clock and memory only every CHECK_EVERY expansions so that an unlimited
+    budget costs next to nothing. The limit that was hit is
+    kept in `exceeded` and result() gives what the search should return: the
+    label of the limit in place of the path, with the counts reached so far."""
+
+    CHECK_EVERY = 256
+
+    def __init__(
+        self,
+        max_seconds: float | None = None,
+        max_expanded: int | None = None,
+        max_states: int | None = None,
+        max_memory: int | None = None,
+    ):
+        self.max_seconds = max_seconds
+        self.max_expanded = max_expanded
+        self.max_states = max_states
+        self.max_memory = max_memory
+
+        self.start()
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.ticks = 0
+        self.next_check = self.CHECK_EVERY
+        self.exceeded: BudgetLimit | None = None
+
+    def exhausted(self, expanded: int, stored: int, ticks: int = 1):
+        if self.exceeded is not None:
+            return True
+
+        if self.max_expanded is not None and expanded >= self.max_expanded:
+            self.exceeded = BudgetLimit.EXPANDED
+        elif self.max_states is not None and stored >= self.max_states:
+            self.exceeded = BudgetLimit.STATES
+        else:
+            self.ticks += ticks
+            if self.ticks < self.next_check:
+                return False
+            self.next_check = self.ticks + self.CHECK_EVERY
+
+            if (
+                self.max_seconds is not None
+                and time.perf_counter() - self.started >= self.max_seconds
+            ):
+                self.exceeded = BudgetLimit.TIME
+            elif (
+                self.max_memory is not None
+                and tracemalloc.is_tracing()
+                and tracemalloc.get_traced_memory()[0] >= self.max_memory
+            ):
+                self.exceeded = BudgetLimit.MEMORY
+
+        return self.exceeded is not None
+
+    def result(self, expanded: int, stored: int):
+        assert self.exceeded is not None
+        return BudgetLimit.get_label(self.exceeded), 0, expanded, stored
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+import numpy as np
+
+
+class HeuristicCache:
+    """Bounded LRU table of heuristic values.
+
+    Keys are (heuristic name, stone set): states that only differ by the player's
+    position share their entry, and so do the algorithms of a level when they are
+    given the same LevelContext."""
+
+    def __init__(self, capacity: int = 1 << 18):
+        self.capacity = capacity
+        self.table: OrderedDict[Hashable, float] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.table)
+
+    def get(self, key: Hashable) -> float | None:
+        value = self.table.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.table.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: float):
+        if self.capacity <= 0:
+            return
+
+        self.table[key] = value
+        self.table.move_to_end(key)
+        if len(self.table) > self.capacity:
+            self.table.popitem(last=False)
+
+
+class TranspositionTable:
+    """Fixed-size table of the cheapest cost a state was reached with.
+
+    Slots are addressed by the low bits of the state's Zobrist hash and the full
+    hash is kept to tell states apart, so memory does not grow with the search.
+    On a collision the resident entry is kept only if it was stored during the
+    current iteration closer to the root: it guards a bigger subtree."""
+
+    def __init__(self, capacity: int = 1 << 20):
+        size = 1 << max(capacity - 1, 0).bit_length()
+        self.mask = size - 1
+
+        self.keys: list[int] = [-1] * size
+        self.gvals: list[float] = [0] * size
+        self.iterations: list[int] = [-1] * size
+
+        self.stored = 0
+        self.hits = 0
+        self.replaced = 0
+
+    def __len__(self):
+        return self.stored
+
+    def probe(self, key: int, gval: float, iteration: int):
+        """Record that the state was reached with gval, return False if it already
+        was as cheaply in this iteration, or more cheaply in any of them."""
+
+        slot = key & self.mask
+        if self.keys[slot] == key:
+            stored = self.gvals[slot]
+            if stored < gval or (stored == gval and self.iterations[slot] == iteration):
+                self.hits += 1
+                return False
+
+        elif self.keys[slot] >= 0:
+            if self.iterations[slot] == iteration and self.gvals[slot] <= gval:
+                return True
+            self.replaced += 1
+
+        else:
+            self.stored += 1
+
+        self.keys[slot] = key
+        self.gvals[slot] = gval
+        self.iterations[slot] = iteration
+        return True
+
+
+class StateSet[T]:
+    """Set of states that only keeps a 128-bit key per state.
+
+    Keys are held in two preallocated uint64 arrays addressed by open addressing
+    with linear probing, 16 bytes a slot, and the arrays are doubled once half
+    full. The low half of a key is forced odd so that 0 marks an empty slot.
+    Two states are told apart only by their keys, which key_of must make as
+    unlikely to collide as a 127-bit hash."""
+
+    def __init__(self, key_of: Callable[[T], int], capacity: int = 1 << 12):
+        self.key_of = key_of
+
+        size = 1 << max(capacity - 1, 1).bit_length()
+        self.mask = size - 1
+        self.high = np.zeros(size, dtype=np.uint64)
+        self.low = np.zeros(size, dtype=np.uint64)
+
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def nbytes(self):
+        return self.high.nbytes + self.low.nbytes
+
+    def slot_of(self, key: int) -> tuple[int, int, int]:
+        # slot of the key, or of the empty slot it would go in
+        high, low = (key >> 64) & 0xFFFFFFFFFFFFFFFF, (key & 0xFFFFFFFFFFFFFFFF) | 1
+
+        slot = high & self.mask
+        while True:
+            resident = int(self.low[slot])
+            if not resident or (resident == low and int(self.high[slot]) == high):
+                return slot, high, low
+            slot = (slot + 1) & self.mask
+
+    def __contains__(self, state: T):
+        slot, _, _ = self.slot_of(self.key_of(state))
+        return bool(self.low[slot])
+
+    def add(self, state: T):
+        slot, high, low = self.slot_of(self.key_of(state))
+        if self.low[slot]:
+            return
+
+        self.high[slot] = high
+        self.low[slot] = low
+        self.size += 1
+
+        if 2 * self.size > self.mask + 1:
+            self.grow()
+
+    def grow(self):
+        used = self.low != 0
+        high, low = self.high[used], self.low[used]
+
+        size = 2 * (self.mask + 1)
+        self.mask = size - 1
+        self.high = np.zeros(size, dtype=np.uint64)
+        self.low = np.zeros(size, dtype=np.uint64)
+
+        # place every key at once: a key goes in its slot if that slot is empty
+        # and no other key claims it, otherwise it tries the next slot
+        slots = (high & np.uint64(self.mask)).astype(np.int64)
+        pending = np.arange(len(high))
+        while len(pending):
+            free = pending[self.low[slots[pending]] == 0]
+            _, first = np.unique(slots[free], return_index=True)
+            placed = free[first]
+
+            self.high[slots[placed]] = high[placed]
+            self.low[slots[placed]] = low[placed]
+
+            pending = np.setdiff1d(pending, placed, assume_unique=True)
+            slots[pending] = (slots[pending] + 1) & self.mask
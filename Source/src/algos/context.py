@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from queue import Queue
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from constants.enums import Direction, GridItem
+
+from .bitboard import BoardIndex
+from .cache import HeuristicCache
+from .deadlock import CorralTable, FreezeTable, MatchingTable
+from .push import push_distance_table
+
+if TYPE_CHECKING:
+    from .search import Point
+
+
+def simple_deadlock_table(
+    matrix: list[list[str]],
+    num_row: int,
+    num_col: int,
+    switches_pos: frozenset[Point],
+):
+    reachable = [[False] * num_col for _ in range(num_row)]
+
+    q: Queue[Point] = Queue()
+    dir_vecs = Direction.get_vec_list()
+    for g in switches_pos:
+        q.put(g)
+        reachable[g[0]][g[1]] = True
+
+        for dx, dy in dir_vecs:
+            nx, ny = g[0] + dx, g[1] + dy
+
+            if (
+                0 <= nx < num_row
+                and 0 <= ny < num_col
+                and matrix[nx][ny] != GridItem.get_char(GridItem.WALL)
+            ):
+                q.put((nx, ny))
+                reachable[nx][ny] = True
+
+    dir_vecs = [(2 * _[0], 2 * _[1]) for _ in dir_vecs]
+    while not q.empty():
+        x, y = q.get()
+
+        for dx, dy in dir_vecs:
+            nx, ny = x + dx // 2, y + dy // 2
+            tx, ty = x + dx, y + dy
+
+            if (
+                0 <= tx < num_row
+                and 0 <= ty < num_col
+                and matrix[nx][ny] != GridItem.get_char(GridItem.WALL)
+                and matrix[tx][ty] != GridItem.get_char(GridItem.WALL)
+                and not reachable[nx][ny]
+            ):
+                q.put((nx, ny))
+                reachable[nx][ny] = True
+
+    return [[not cell for cell in row] for row in reachable]
+
+
+class LevelContext:
+    """Static data of a level, compiled once and shared by every algorithm.
+
+    Cells are addressed by their flat index `x * num_col + y`; the tables below
+    are indexed by [cell][direction index]."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        matrix: list[list[str]],
+        switches_pos: frozenset[Point],
+    ):
+        self.num_row = num_row
+        self.num_col = num_col
+        self.matrix = matrix
+
+        self.switches_pos = frozenset(switches_pos)
+
+        wall = GridItem.get_char(GridItem.WALL)
+        num_cell = num_row * num_col
+
+        self.points: list[Point] = [
+            (x, y) for x in range(num_row) for y in range(num_col)
+        ]
+        self.walls = bytearray(matrix[x][y] == wall for x, y in self.points)
+
+        dir_vecs = Direction.get_vec_list()
+
+        # cell the player steps on, -1 for walls and the outer border
+        self.neighbors: list[tuple[int, ...]] = [
+            tuple(
+                (x + dx) * num_col + (y + dy)
+                if 1 <= x + dx < num_row - 1
+                and 1 <= y + dy < num_col - 1
+                and not self.walls[(x + dx) * num_col + (y + dy)]
+                else -1
+                for dx, dy in dir_vecs
+            )
+            for x, y in self.points
+        ]
+
+        # cell a stone next to the player lands on when pushed, -1 for walls
+        self.push_targets: list[tuple[int, ...]] = [
+            tuple(
+                (x + 2 * dx) * num_col + (y + 2 * dy)
+                if 0 <= x + 2 * dx < num_row
+                and 0 <= y + 2 * dy < num_col
+                and not self.walls[(x + 2 * dx) * num_col + (y + 2 * dy)]
+                else -1
+                for dx, dy in dir_vecs
+            )
+            for x, y in self.points
+        ]
+
+        self.has_simple_deadlock = simple_deadlock_table(
+            matrix, num_row, num_col, self.switches_pos
+        )
+        self.dead = bytearray(self.has_simple_deadlock[x][y] for x, y in self.points)
+
+        self.goals = bytearray(num_cell)
+        for x, y in self.switches_pos:
+            self.goals[x * num_col + y] = 1
+
+        # goal index of the push-distance and matching tables, by ascending cell
+        self.goal_cells = [cell for cell, goal in enumerate(self.goals) if goal]
+        self.goal_index = {
+            self.points[cell]: g for g, cell in enumerate(self.goal_cells)
+        }
+
+        self.goal_array = np.array(
+            [self.points[cell] for cell in self.goal_cells], dtype=np.int64
+        ).reshape(-1, 2)
+
+        self._push_distances: list[list[int]] | None = None
+        self._push_distance_array: np.ndarray | None = None
+        # heuristic values, shared by every informed search of the level
+        self.heuristic_cache = HeuristicCache()
+
+        self._board: BoardIndex | None = None
+        self._freeze: FreezeTable | None = None
+        self._corral: CorralTable | None = None
+        self._matching: MatchingTable | None = None
+
+    @property
+    def board(self) -> BoardIndex:
+        # only the bitboard engine needs dense indices, so build them on demand
+        if self._board is None:
+            self._board = BoardIndex(
+                self.num_row, self.num_col, self.matrix, self.switches_pos
+            )
+        return self._board
+
+    @property
+    def push_distances(self) -> list[list[int]]:
+        # [goal index][cell] pushes of a lone stone, a goal it cannot get to costs
+        # one push per cell so that any assignment stays a lower bound
+        if self._push_distances is None:
+            self._push_distances = push_distance_table(self, self.goal_cells)
+        return self._push_distances
+
+    @property
+    def push_distance_array(self) -> np.ndarray:
+        # same table as an array, for gathering whole cost matrices at once
+        if self._push_distance_array is None:
+            self._push_distance_array = np.array(
+                self.push_distances, dtype=np.int64
+            ).reshape(len(self.goal_cells), len(self.points))
+        return self._push_distance_array
+
+    @property
+    def freeze(self) -> FreezeTable:
+        # freeze verdicts are kept for the lifetime of the level
+        if self._freeze is None:
+            self._freeze = FreezeTable(self)
+        return self._freeze
+
+    @property
+    def corral(self) -> CorralTable:
+        if self._corral is None:
+            self._corral = CorralTable(self)
+        return self._corral
+
+    @property
+    def matching(self) -> MatchingTable:
+        if self._matching is None:
+            self._matching = MatchingTable(self)
+        return self._matching
+
+    def cell(self, pos: Point):
+        return pos[0] * self.num_col + pos[1]
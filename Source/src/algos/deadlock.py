@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from constants.enums import Direction
+
+from .bitboard import iter_bits
+
+if TYPE_CHECKING:
+    from .context import LevelContext
+
+
+class FreezeTable:
+    """Memoized freeze deadlock checks of a level.
+
+    Stones are given as a bitmask over flat cells. A verdict only depends on the
+    stones the check looked at, so it is cached under the occupancy of the 5x5
+    window around the pushed stone, unless the check had to look further away."""
+
+    RADIUS = 2
+
+    def __init__(self, ctx: LevelContext):
+        self.ctx = ctx
+
+        num_col = ctx.num_col
+        self.axes = [
+            tuple(dx * num_col + dy for dx, dy in vecs)
+            for vecs in (
+                (Direction.get_vec(Direction.DOWN), Direction.get_vec(Direction.UP)),
+                (Direction.get_vec(Direction.RIGHT), Direction.get_vec(Direction.LEFT)),
+            )
+        ]
+
+        r = self.RADIUS
+        self.windows: list[int] = []
+        for x, y in ctx.points:
+            window = 0
+            for wx in range(max(x - r, 0), min(x + r + 1, ctx.num_row)):
+                for wy in range(max(y - r, 0), min(y + r + 1, num_col)):
+                    window |= 1 << (wx * num_col + wy)
+            self.windows.append(window)
+
+        self.cache: dict[tuple[int, int], bool] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_frozen(self, cell: int, stones: int):
+        window = self.windows[cell]
+        key = (cell, stones & window)
+
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+
+        self.misses += 1
+        self.window = window
+        self.local = True
+
+        verdict = self.check(cell, stones, set())
+        if self.local:
+            self.cache[key] = verdict
+
+        return verdict
+
+    def check(self, cell: int, stones: int, checked_list: set[int]):
+        # frozen when blocked along both axes, by a wall, by dead cells on both
+        # sides or by a stone frozen itself; checked_list holds the chain of
+        # stones being checked, a stone met again counts as blocking. It is only
+        # a deadlock if one stone of the chain is off its goal
+        checked_list.add(cell)
+
+        frozen = all(
+            self.check_axis(cell, stones, checked_list, axis) for axis in self.axes
+        )
+        result = frozen and any(not self.ctx.goals[c] for c in checked_list)
+
+        checked_list.remove(cell)
+        return result
+
+    def check_axis(
+        self,
+        cell: int,
+        stones: int,
+        checked_list: set[int],
+        axis: tuple[int, ...],
+    ):
+        ctx = self.ctx
+        simple_dl_count = 0
+
+        for delta in axis:
+            nxt = cell + delta
+
+            if ctx.walls[nxt]:
+                return True
+
+            if ctx.dead[nxt]:
+                simple_dl_count += 1
+                if simple_dl_count == 2:
+                    return True
+                continue
+
+            if not (self.window >> nxt) & 1:
+                self.local = False
+
+            if (stones >> nxt) & 1 and (
+                nxt in checked_list or self.check(nxt, stones, checked_list)
+            ):
+                return True
+
+        return False
+
+
+class CorralTable:
+    """Corral deadlock checks of a level.
+
+    A corral is an area the player cannot reach, fenced by stones. When every push
+    the player can make on the fence goes into the corral, a bounded push search
+    with only the fence stones on the board tries to open the corral or put the
+    fence stones on goals. Removing the other stones only makes that easier, so
+    if it fails the corral cannot be solved in the real level either."""
+
+    def __init__(self, ctx: LevelContext, max_nodes: int = 200):
+        self.ctx = ctx
+        self.max_nodes = max_nodes
+
+        self.floor = [
+            cell
+            for cell, wall in enumerate(ctx.walls)
+            if not wall and not ctx.dead[cell]
+        ]
+        self.goal_mask = 0
+        for cell, goal in enumerate(ctx.goals):
+            if goal:
+                self.goal_mask |= 1 << cell
+
+        self.cache: dict[tuple[int, int, int], bool] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def flood(self, start: int, stones: int):
+        neighbors = self.ctx.neighbors
+
+        region = {start}
+        stack = [start]
+        while stack:
+            for nxt in neighbors[stack.pop()]:
+                if nxt >= 0 and nxt not in region and not (stones >> nxt) & 1:
+                    region.add(nxt)
+                    stack.append(nxt)
+
+        return region
+
+    def is_deadlocked(self, stones: int, player: int):
+        neighbors = self.ctx.neighbors
+
+        region = self.flood(player, stones)
+        seen = set(region)
+        for start in self.floor:
+            if start in seen or (stones >> start) & 1:
+                continue
+
+            corral = self.flood(start, stones)
+            seen |= corral
+
+            fence = 0
+            for cell in corral:
+                for nxt in neighbors[cell]:
+                    if nxt >= 0 and (stones >> nxt) & 1:
+                        fence |= 1 << nxt
+
+            # nothing to prove when the fence is already in place
+            if not fence & ~self.goal_mask:
+                continue
+
+            if self.is_closed(corral, fence, stones, region) and self.prove(
+                corral, fence, player
+            ):
+                return True
+
+        return False
+
+    def is_closed(self, corral: set[int], fence: int, stones: int, region: set[int]):
+        # every push the player can make on the fence goes into the corral
+        ctx = self.ctx
+
+        for stone in iter_bits(fence):
+            for d in range(len(ctx.neighbors[stone])):
+                push_from = ctx.neighbors[stone][d ^ 1]
+                if push_from not in region:
+                    continue
+
+                target = ctx.push_targets[push_from][d]
+                if target < 0 or (stones >> target) & 1 or ctx.dead[target]:
+                    continue
+
+                if target not in corral:
+                    return False
+
+        return True
+
+    def prove(self, corral: set[int], fence: int, player: int):
+        # the corral is only bounded by walls and its fence, so the fence and
+        # any of its cells tell it apart from the other corrals of that fence
+        region = self.flood(player, fence)
+        key = (fence, min(region), min(corral))
+
+        verdict = self.cache.get(key)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+
+        self.misses += 1
+        verdict = self.search(corral, fence, player)
+        self.cache[key] = verdict
+        return verdict
+
+    def search(self, corral: set[int], fence: int, player: int):
+        ctx = self.ctx
+
+        visited = {(fence, min(self.flood(player, fence)))}
+        frontier = [(fence, player)]
+        nodes = 0
+        while frontier:
+            stones, player = frontier.pop()
+
+            nodes += 1
+            if nodes > self.max_nodes:
+                return False
+
+            region = self.flood(player, stones)
+            if not region.isdisjoint(corral) or not stones & ~self.goal_mask:
+                return False
+
+            for stone in iter_bits(stones):
+                for d in range(len(ctx.neighbors[stone])):
+                    push_from = ctx.neighbors[stone][d ^ 1]
+                    if push_from not in region:
+                        continue
+
+                    target = ctx.push_targets[push_from][d]
+                    if target < 0 or (stones >> target) & 1 or ctx.dead[target]:
+                        continue
+
+                    new_stones = stones ^ (1 << stone) ^ (1 << target)
+                    if ctx.freeze.is_frozen(target, new_stones):
+                        continue
+
+                    key = (new_stones, min(self.flood(stone, new_stones)))
+                    if key not in visited:
+                        visited.add(key)
+                        frontier.append((new_stones, stone))
+
+        return True
+
+
+class MatchingTable:
+    """Bipartite deadlock checks of a level.
+
+    reach[cell] is the bitmask of the goals a lone stone on cell can be pushed to.
+    A state is deadlocked when its stones cannot all be matched to distinct goals.
+    A push moves a single stone, so the parent's matching is repaired with one
+    augmenting path instead of being rebuilt. Repaired matchings are kept in a
+    bounded side table keyed by stones, oldest out first, so that a state
+    expanded later starts from the matching its parent left for it."""
+
+    def __init__(self, ctx: LevelContext, capacity: int = 1 << 16):
+        self.ctx = ctx
+        self.capacity = capacity
+
+        self.matchings: dict[int, list[int]] = {}
+        self.solved = 0
+        self.repaired = 0
+
+        unreachable = len(ctx.points)
+        self.reach = [0] * unreachable
+        for g, dist in enumerate(ctx.push_distances):
+            for cell, pushes in enumerate(dist):
+                if pushes < unreachable:
+                    self.reach[cell] |= 1 << g
+
+    def match(self, stones: int):
+        """Return goal index -> stone cell of a perfect matching, None if there is
+        no such matching."""
+
+        owner = self.matchings.get(stones)
+        if owner is not None:
+            return owner
+
+        owner = [-1] * len(self.ctx.goal_cells)
+        for stone in iter_bits(stones):
+            if not self.augment(stone, owner, set()):
+                return None
+        self.solved += 1
+
+        return self.store(stones, owner)
+
+    def push(self, owner: list[int], stones: int, src: int, dst: int):
+        """Matching of the stones after the one on src is pushed to dst, repaired
+        from owner and kept for when that state is expanded, None if there is
+        none."""
+
+        new_stones = stones ^ (1 << src) ^ (1 << dst)
+        new_owner = self.matchings.get(new_stones)
+        if new_owner is not None:
+            return new_owner
+
+        new_owner = self.rematch(owner, src, dst)
+        if new_owner is None:
+            return None
+        self.repaired += 1
+
+        return self.store(new_stones, new_owner)
+
+    def store(self, stones: int, owner: list[int]):
+        if len(self.matchings) >= self.capacity:
+            del self.matchings[next(iter(self.matchings))]
+
+        self.matchings[stones] = owner
+        return owner
+
+    def rematch(self, owner: list[int], src: int, dst: int):
+        """Matching after the stone on src is pushed to dst, None if there is none.
+        owner is left untouched so it can be shared by every child of a state."""
+
+        g = owner.index(src)
+        new_owner = owner.copy()
+        if (self.reach[dst] >> g) & 1:
+            new_owner[g] = dst
+            return new_owner
+
+        new_owner[g] = -1
+        return new_owner if self.augment(dst, new_owner, set()) else None
+
+    def augment(self, stone: int, owner: list[int], visited: set[int]):
+        for g in iter_bits(self.reach[stone]):
+            if g in visited:
+                continue
+            visited.add(g)
+
+            if owner[g] < 0 or self.augment(owner[g], owner, visited):
+                owner[g] = stone
+                return True
+
+        return False
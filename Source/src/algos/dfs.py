@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from constants.enums import Direction
 from utils.metrics import profile
 
 from .search import Point, ProblemState, Search, StonesPos
@@ -16,6 +15,7 @@ class DFS(Search):
         stones_pos: StonesPos,
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -25,17 +25,23 @@ class DFS(Search):
             stones_pos,
             switches_pos,
             use_deadlock=use_deadlock,
+            **kwargs,
         )
 
     @profile
     def search(self):
+        self.budget.start()
+
         frontier: list[ProblemState] = [self.initial_state]
 
-        closed: set[ProblemState] = set()
+        closed = self.closed_set()
         closed.add(self.initial_state)
 
         expanded_count = 0
         while frontier:
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
+
             expanded_count += 1
 
             current_state = frontier.pop()
@@ -43,12 +49,9 @@ class DFS(Search):
                 path, w = self.construct_path(current_state)
                 return path, w, expanded_count, len(closed)
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir)
-
-                    if new_state not in closed:
-                        closed.add(new_state)
-                        frontier.append(new_state)
+            for new_state in self.successors(current_state):
+                if new_state not in closed:
+                    closed.add(new_state)
+                    frontier.append(new_state)
 
         return "Impossible", 0, expanded_count, len(closed)
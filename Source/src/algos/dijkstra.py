@@ -1,14 +1,10 @@
 from __future__ import annotations
 
-import heapq
+from .search import Point, ProblemState, StonesPosFreeze
+from .ucs import UCS
 
-from constants.enums import Direction
-from utils.metrics import profile
 
-from .search import Point, ProblemState, Search, StateHashTable, StonesPosFreeze
-
-
-class Dijkstra(Search):
+class Dijkstra(UCS):
     def __init__(
         self,
         num_row: int,
@@ -18,6 +14,8 @@ class Dijkstra(Search):
         stones_pos: StonesPosFreeze,
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
+        max_cost: float | None = None,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -27,72 +25,36 @@ class Dijkstra(Search):
             stones_pos,
             switches_pos,
             use_deadlock=use_deadlock,
-            use_weight=True,
+            **kwargs,
         )
 
-        self.initial_state.gval = 0
-
-    def handle(
-        self,
-        new_state: ProblemState,
-        closed: set[ProblemState],
-        frontier: list[ProblemState],
-        state_hash_table: StateHashTable,
-    ):
-        id = hash(new_state)
-
-        if new_state not in closed:
-            heapq.heappush(frontier, new_state)
-            closed.add(new_state)
-            state_hash_table[id] = [new_state, True]
-            return
-
-        if new_state.gval < state_hash_table[id][0].gval:
-            state_hash_table[id][0].gval = new_state.gval
-            state_hash_table[id][0].ancestor = new_state.ancestor
-            state_hash_table[id][0].pushed_stone = new_state.pushed_stone
-
-            if not state_hash_table[id][1]:
-                state_hash_table[id][1] = True
-                heapq.heappush(frontier, new_state)
-
-    @profile
-    def search(self):
-        frontier: list[ProblemState] = []
-        heapq.heappush(frontier, self.initial_state)
-
-        closed: set[ProblemState] = set()
-        closed.add(self.initial_state)
-
-        state_hash_table = {hash(self.initial_state): [self.initial_state, True]}
-
-        expanded_count = 0
-        while frontier:
-            current_state = heapq.heappop(frontier)
-            current_hash = hash(current_state)
-            if state_hash_table[current_hash][0] != current_state:
-                continue
+        # None stops at the first goal popped, which is a cheapest one; otherwise
+        # every goal state up to max_cost is collected in final_states, cheapest
+        # first, and is the output of the sweep: search() only returns the path
+        # to the first of them. Goals are not expanded, so none of them is
+        # reached by moving on from another one
+        self.max_cost = max_cost
+        self.final_states: list[ProblemState] = []
 
-            expanded_count += 1
+    def begin(self):
+        super().begin()
+        self.final_states = []
 
-            state_hash_table[current_hash][1] = False
+    def stop_at(self, goal: ProblemState) -> bool:
+        if self.max_cost is None:
+            return True
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir)
-                    self.handle(new_state, closed, frontier, state_hash_table)
+        self.final_states.append(goal)
+        return False
 
-        min_g = float("inf")
-        min_state = None
-        for x in state_hash_table.values():
-            state: ProblemState = x[0]
-            if state.is_final(self.switches_pos):
-                if state.gval < min_g:
-                    min_g = state.gval
-                    min_state = state
+    def past_sweep(self, gval: float) -> bool:
+        # costs come out of the queue in increasing order
+        return self.max_cost is not None and gval > self.max_cost
 
-        if min_state is None:
-            return "Impossible", 0, expanded_count, len(closed)
+    def finish(self, expanded_count: int, stored: int):
+        # goals come out cheapest first: a budget only cuts the sweep short
+        if not self.final_states:
+            return super().finish(expanded_count, stored)
 
-        path, w = self.construct_path(min_state)
-        return path, w, expanded_count, len(closed)
+        path, w = self.construct_path(self.final_states[0])
+        return path, w, expanded_count, stored
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import heapq
+import struct
+from collections.abc import Iterable, Iterator
+
+
+def record_struct(fields: int, cells: int) -> struct.Struct:
+    # unsigned cells, big-endian so that records sort as bytes the same way as
+    # their cells do, two bytes each unless the grid has more cells than that
+    return struct.Struct(f">{fields}{'H' if cells <= 1 << 16 else 'I'}")
+
+
+def write_records(path: str, records: Iterable[bytes]):
+    # records are written back to back, their width is known by the reader
+    count = 0
+    with open(path, "wb") as f:
+        for record in records:
+            f.write(record)
+            count += 1
+    return count
+
+
+def read_records(path: str, width: int, chunk: int = 1 << 14) -> Iterator[bytes]:
+    # stream the records of a file, chunk of them per read
+    with open(path, "rb") as f:
+        while buffer := f.read(width * chunk):
+            for i in range(0, len(buffer), width):
+                yield buffer[i : i + width]
+
+
+def merge_unique(runs: Iterable[Iterator[bytes]]) -> Iterator[bytes]:
+    # one sorted stream out of sorted runs, records found in several runs once
+    last = None
+    for record in heapq.merge(*runs):
+        if record != last:
+            yield record
+            last = record
+
+
+def subtract(records: Iterator[bytes], seen: Iterator[bytes]) -> Iterator[bytes]:
+    # sorted records not found in the sorted seen ones, both read once
+    other = next(seen, None)
+    for record in records:
+        while other is not None and other < record:
+            other = next(seen, None)
+        if record != other:
+            yield record
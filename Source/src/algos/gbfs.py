@@ -1,14 +1,9 @@
 from __future__ import annotations
 
-import heapq
-
-import numpy as np
-from scipy.optimize import linear_sum_assignment
-
-from constants.enums import Direction
-from utils.base import manhattan
 from utils.metrics import profile
 
+from .cache import StateSet
+from .queues import BucketOpenList
 from .search import Point, ProblemState, Search, StateHashTable, StonesPosFreeze
 
 
@@ -23,6 +18,7 @@ class GBFS(Search):
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
         use_optimized: bool = True,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -33,106 +29,92 @@ class GBFS(Search):
             switches_pos,
             use_deadlock=use_deadlock,
             use_weight=True,
+            **kwargs,
         )
 
         self.use_optimized = use_optimized
+        self.evaluator = self.make_heuristic(use_optimized)
 
         self.initial_state.fval = self.heuristic(frozenset(stones_pos), switches_pos)
 
     def handle(
         self,
         new_state: ProblemState,
-        closed: set[ProblemState],
-        frontier: list[ProblemState],
+        closed: set[ProblemState] | StateSet[ProblemState],
+        frontier: BucketOpenList[ProblemState],
         state_hash_table: StateHashTable,
     ):
         id = hash(new_state)
 
         if new_state not in closed:
             closed.add(new_state)
-            heapq.heappush(frontier, new_state)
+            frontier.push(new_state.fval, new_state.gval, new_state)
             state_hash_table[id] = [new_state, True]
             return
 
-        if new_state.fval < state_hash_table[id][0].fval:
-            state_hash_table[id][0].fval = new_state.fval
-            state_hash_table[id][0].ancestor = new_state.ancestor
-            state_hash_table[id][0].pushed_stone = new_state.pushed_stone
-
-            if not state_hash_table[id][1]:
-                state_hash_table[id][1] = True
-                heapq.heappush(frontier, new_state)
-
-    def heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        return (
-            self.hungarian_heuristic(stones_pos, switches_pos)
-            if self.use_optimized
-            else self.mahattan_heuristic(stones_pos, switches_pos)
-        )
-
-    def mahattan_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        sum = 0
-        for stone in stones_pos:
-            sum = sum + stone[2] * min(
-                [
-                    manhattan(stone[0], stone[1], switch[0], switch[1])
-                    for switch in switches_pos
-                ]
-            )
-        return sum
-
-    def hungarian_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        dists = np.zeros((len(stones_pos), len(switches_pos)))
+        # with a compact closed set, expanded states are only known by their key
+        if id not in state_hash_table:
+            return
 
-        for i, (sx, sy, w) in enumerate(stones_pos):
-            for j, (gx, gy) in enumerate(switches_pos):
-                dists[i, j] = w * manhattan(sx, sy, gx, gy)
+        state = state_hash_table[id][0]
+        if new_state.fval < state.fval:
+            state.fval = new_state.fval
+            state.ancestor = new_state.ancestor
+            state.pushed_stone = new_state.pushed_stone
 
-        row_ind, col_ind = linear_sum_assignment(dists)
-        return dists[row_ind, col_ind].sum()
+            # file it again under its new key, the old entry is skipped when popped
+            state_hash_table[id][1] = True
+            frontier.push(state.fval, state.gval, state)
 
     @profile
     def search(self):
-        frontier: list[ProblemState] = []
-        heapq.heappush(frontier, self.initial_state)
+        self.budget.start()
 
-        closed: set[ProblemState] = set()
+        frontier: BucketOpenList[ProblemState] = BucketOpenList()
+        frontier.push(
+            self.initial_state.fval, self.initial_state.gval, self.initial_state
+        )
+
+        closed = self.closed_set()
         closed.add(self.initial_state)
 
         state_hash_table = {hash(self.initial_state): [self.initial_state, True]}
 
         expanded_count = 0
         while frontier:
-            current_state = heapq.heappop(frontier)
+            fval, gval, current_state = frontier.pop()
+
+            # skip entries filed under outdated keys or already expanded
+            current_hash = hash(current_state)
+            entry = state_hash_table.get(current_hash)
+            if entry is None:
+                continue
+
+            state, in_frontier = entry
+            if (
+                state is not current_state
+                or not in_frontier
+                or (fval, gval) != (state.fval, state.gval)
+            ):
+                continue
+
             if current_state.is_final(self.switches_pos):
                 path, w = self.construct_path(current_state)
                 return path, w, expanded_count, len(closed)
 
-            current_hash = hash(current_state)
-            if state_hash_table[current_hash][0] != current_state:
-                continue
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
 
-            state_hash_table[current_hash][1] = False
+            if self.use_compact:
+                del state_hash_table[current_hash]
+            else:
+                state_hash_table[current_hash][1] = False
 
             expanded_count += 1
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir, heuristic=self.heuristic)
-                    new_state.fval -= new_state.gval
-                    new_state.gval = 0
-                    self.handle(new_state, closed, frontier, state_hash_table)
+            for new_state in self.successors_batch(current_state, self.heuristic_batch):
+                new_state.fval -= new_state.gval
+                new_state.gval = 0
+                self.handle(new_state, closed, frontier, state_hash_table)
 
         return "Impossible", 0, expanded_count, len(closed)
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import signal
+import sys
+import threading
+from multiprocessing.process import BaseProcess
+
+from utils.metrics import profile
+
+from .astar import AStar
+from .queues import BucketOpenList
+from .search import Point, ProblemState, Stone, StonesPosFreeze
+
+# what a worker needs to own a state generated by another one: player, stones,
+# g, f, pushed stone, Zobrist hash and the hash of the state it comes from
+type StateRecord = tuple[
+    Point, StonesPosFreeze, int, float, Stone | None, int, int | None
+]
+
+
+class HDAStar(AStar):
+    """Hash distributed A*: every state is owned by the worker process picked
+    by its Zobrist hash, the only one to store and expand it.
+
+    Workers run in rounds of up to batch_size expansions. Children owned by
+    another worker are sent to it in one batch per round, and every worker
+    reports to the search how many batches it sent, the lowest priority it still
+    has to expand and the goals it popped. The search tells each worker how many
+    batches to wait for before its next round, so nothing is in flight between
+    rounds: once the cheapest goal found costs no more than the lowest priority
+    left anywhere, it is optimal (within epsilon of it with epsilon > 1). Its
+    path is then traced back owner by owner.
+
+    As in run_portfolio, workers are not daemonic and a SIGTERM exits them, and
+    the search, through their finally blocks: every worker is stopped, then
+    terminated if it does not exit, and joined before search() returns. A worker
+    that fails or dies fails the search with its error or exit code."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        matrix: list[list[str]],
+        player_pos: Point,
+        stones_pos: StonesPosFreeze,
+        switches_pos: frozenset[Point],
+        use_deadlock: bool = True,
+        use_optimized: bool = True,
+        num_workers: int | None = None,
+        batch_size: int = 256,
+        **kwargs,
+    ):
+        # states are sent as plain positions and one pass finds the optimum
+        kwargs.pop("use_bitboard", None)
+        kwargs.pop("anytime", None)
+
+        super().__init__(
+            num_row,
+            num_col,
+            matrix,
+            player_pos,
+            stones_pos,
+            switches_pos,
+            use_deadlock=use_deadlock,
+            use_optimized=use_optimized,
+            **kwargs,
+        )
+
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # seconds between checks that no worker died while waiting on reports
+        self.poll_timeout = 1.0
+
+    def owner_of(self, zobrist_hash: int):
+        return zobrist_hash % self.num_workers
+
+    def record_of(self, state: ProblemState, parent: int | None) -> StateRecord:
+        return (
+            state.player_pos,
+            state.stones_pos,
+            state.gval,
+            state.fval,
+            state.pushed_stone,
+            self.hash_of(state),
+            parent,
+        )
+
+    def worker(
+        self,
+        rank: int,
+        inboxes: list[mp.Queue],
+        control: mp.Queue,
+        reports: mp.Queue,
+    ):
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+
+        try:
+            self.work(rank, inboxes, control, reports)
+        except Exception as e:
+            # the search waits on reports, hand it the error before failing
+            reports.put(e)
+            raise
+
+    def work(
+        self,
+        rank: int,
+        inboxes: list[mp.Queue],
+        control: mp.Queue,
+        reports: mp.Queue,
+    ):
+        frontier: BucketOpenList[ProblemState] = BucketOpenList()
+        # hash -> [state, in frontier, hash of the state it was reached from]
+        state_hash_table: dict[int, list] = {}
+
+        def receive(record: StateRecord):
+            player_pos, stones_pos, gval, fval, pushed_stone, id, parent = record
+
+            entry = state_hash_table.get(id)
+            if entry is None:
+                state = ProblemState(
+                    None,
+                    player_pos,
+                    stones_pos,
+                    gval,
+                    fval,
+                    pushed_stone=pushed_stone,
+                    with_heuristic=True,
+                    use_weight=True,
+                    zobrist_hash=id,
+                )
+                state_hash_table[id] = [state, True, parent]
+                frontier.push(self.priority(state), gval, state)
+                return
+
+            state = entry[0]
+            if gval < state.gval:
+                state.gval = gval
+                state.fval = fval
+                state.pushed_stone = pushed_stone
+                entry[1:] = [True, parent]
+                frontier.push(self.priority(state), gval, state)
+
+        if self.owner_of(self.hash_of(self.initial_state)) == rank:
+            receive(self.record_of(self.initial_state, None))
+
+        while True:
+            message = control.get()
+
+            if message[0] == "stop":
+                return
+
+            if message[0] == "trace":
+                state, _, parent = state_hash_table[message[1]]
+                reports.put(
+                    (state.player_pos, state.stones_pos, state.pushed_stone, parent)
+                )
+                continue
+
+            _, incumbent, expected = message
+            for _ in range(expected):
+                for record in inboxes[rank].get():
+                    receive(record)
+
+            outboxes: list[list[StateRecord]] = [[] for _ in inboxes]
+            # lowest priority of the states sent, open lists are keyed the same
+            lowest = float("inf")
+            best = None
+            expanded_count = 0
+            while frontier and expanded_count < self.batch_size:
+                priority, gval, current_state = frontier.pop()
+
+                current_hash = self.hash_of(current_state)
+                state, in_frontier, _ = state_hash_table[current_hash]
+                if (
+                    not in_frontier
+                    or (priority, gval) != (self.priority(state), state.gval)
+                    or priority >= incumbent
+                ):
+                    continue
+
+                state_hash_table[current_hash][1] = False
+
+                if current_state.is_final(self.switches_pos):
+                    incumbent = gval
+                    best = (gval, current_hash)
+                    continue
+
+                expanded_count += 1
+
+                for new_state in self.successors_batch(
+                    current_state, self.heuristic_batch
+                ):
+                    record = self.record_of(new_state, current_hash)
+                    owner = self.owner_of(record[5])
+                    if owner == rank:
+                        receive(record)
+                    else:
+                        outboxes[owner].append(record)
+                        lowest = min(lowest, self.priority(new_state))
+
+            if frontier:
+                lowest = min(lowest, frontier.peek()[0])
+
+            sent = []
+            for owner, records in enumerate(outboxes):
+                if records:
+                    inboxes[owner].put(records)
+                    sent.append(owner)
+
+            reports.put(
+                (rank, sent, lowest, best, expanded_count, len(state_hash_table))
+            )
+
+    def report(self, reports: mp.Queue, workers: list[BaseProcess]):
+        exited: set[int] = set()
+        while True:
+            try:
+                report = reports.get(timeout=self.poll_timeout)
+                break
+            except queue.Empty:
+                # workers only exit when stopped, a report is flushed before its
+                # worker exits so one already gone at the last timeout has none
+                dead = {
+                    rank for rank, _ in enumerate(workers) if _.exitcode is not None
+                }
+                if dead & exited:
+                    rank = min(dead & exited)
+                    raise RuntimeError(
+                        f"HDA* worker {rank} exited with code {workers[rank].exitcode}"
+                    )
+                exited = dead
+
+        if isinstance(report, Exception):
+            raise report
+        return report
+
+    def trace(
+        self,
+        controls: list[mp.Queue],
+        reports: mp.Queue,
+        workers: list[BaseProcess],
+        goal: int,
+    ):
+        # ask the owner of every state on the path for it and where it came from
+        records = []
+        id: int | None = goal
+        while id is not None:
+            controls[self.owner_of(id)].put(("trace", id))
+            records.append(self.report(reports, workers))
+            id = records[-1][3]
+
+        state = None
+        for player_pos, stones_pos, pushed_stone, _ in reversed(records):
+            state = ProblemState(
+                state, player_pos, stones_pos, pushed_stone=pushed_stone
+            )
+
+        assert state is not None
+        return self.construct_path(state)
+
+    @profile
+    def search(self):
+        # a SIGTERM goes through the finally block that stops the workers, only
+        # the main thread can handle signals
+        if threading.current_thread() is not threading.main_thread():
+            return self.search_workers()
+
+        previous = signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+        try:
+            return self.search_workers()
+        finally:
+            signal.signal(
+                signal.SIGTERM, signal.SIG_DFL if previous is None else previous
+            )
+
+    def search_workers(self):
+        self.budget.start()
+
+        ctx = mp.get_context()
+        inboxes = [ctx.Queue() for _ in range(self.num_workers)]
+        controls = [ctx.Queue() for _ in range(self.num_workers)]
+        reports = ctx.Queue()
+
+        workers = [
+            ctx.Process(
+                target=self.worker,
+                args=(rank, inboxes, controls[rank], reports),
+            )
+            for rank in range(self.num_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        incumbent = float("inf")
+        goal: int | None = None
+        expected = [0] * self.num_workers
+        expanded_count = 0
+        stored = [0] * self.num_workers
+        try:
+            while True:
+                for rank, control in enumerate(controls):
+                    control.put(("go", incumbent, expected[rank]))
+
+                expected = [0] * self.num_workers
+                lowest = float("inf")
+                round_expanded = 0
+                for _ in range(self.num_workers):
+                    rank, sent, worker_lowest, best, expanded, size = self.report(
+                        reports, workers
+                    )
+
+                    for owner in sent:
+                        expected[owner] += 1
+                    lowest = min(lowest, worker_lowest)
+                    if best and best[0] < incumbent:
+                        incumbent, goal = best
+
+                    round_expanded += expanded
+                    stored[rank] = size
+
+                expanded_count += round_expanded
+
+                # nothing left below the cheapest goal, or nothing left at all
+                if lowest >= incumbent:
+                    break
+
+                if self.budget.exhausted(expanded_count, sum(stored), round_expanded):
+                    return self.budget.result(expanded_count, sum(stored))
+
+            if goal is None:
+                return "Impossible", 0, expanded_count, sum(stored)
+
+            path, w = self.trace(controls, reports, workers, goal)
+            return path, w, expanded_count, sum(stored)
+        finally:
+            for control in controls:
+                control.put(("stop",))
+            for worker in workers:
+                worker.join(timeout=1)
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
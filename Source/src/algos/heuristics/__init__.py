@@ -0,0 +1,35 @@
+from constants.enums import HeuristicType
+
+from .base import Heuristic
+from .manhattan import HungarianHeuristic, ManhattanHeuristic
+from .push_distance import MatchingHeuristic, PushDistanceHeuristic
+
+
+def make_heuristic(
+    heuristic: str | HeuristicType | Heuristic, *, incremental: bool = False
+) -> Heuristic:
+    if isinstance(heuristic, Heuristic):
+        return heuristic
+
+    if isinstance(heuristic, str):
+        heuristic = HeuristicType.from_label(heuristic)
+
+    match heuristic:
+        case HeuristicType.MANHATTAN:
+            return ManhattanHeuristic()
+        case HeuristicType.HUNGARIAN:
+            return HungarianHeuristic()
+        case HeuristicType.PUSH:
+            return PushDistanceHeuristic()
+        case HeuristicType.MATCHING:
+            return MatchingHeuristic(incremental=incremental)
+
+
+__all__ = [
+    "Heuristic",
+    "HungarianHeuristic",
+    "ManhattanHeuristic",
+    "MatchingHeuristic",
+    "PushDistanceHeuristic",
+    "make_heuristic",
+]
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from typing import TYPE_CHECKING, ClassVar
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+if TYPE_CHECKING:
+    from ..cache import HeuristicCache
+    from ..context import LevelContext
+    from ..search import Search, StonesPos
+
+
+class Heuristic(ABC):
+    """Estimated cost left to push every stone onto a goal.
+
+    prepare() binds the heuristic to the level of a search once; evaluate() and
+    evaluate_batch() then score stone sets through the level's heuristic cache.
+    Subclasses only implement compute(), and compute_batch() when they can score
+    many stone sets faster than one by one."""
+
+    name: ClassVar[str]
+
+    context: LevelContext
+    cache: HeuristicCache
+
+    def prepare(self, search: Search):
+        self.context = search.context
+        self.cache = search.context.heuristic_cache
+        return self
+
+    def evaluate(self, stones_pos: StonesPos) -> float:
+        key = (self.name, stones_pos)
+        h = self.cache.get(key)
+        if h is None:
+            h = self.compute(stones_pos)
+            self.cache.put(key, h)
+        return h
+
+    def evaluate_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        # parent is the stone set every entry was generated from, if they share one
+        cache = self.cache
+        scores = [cache.get((self.name, _)) for _ in stones_list]
+
+        misses = [_ for _, h in zip(stones_list, scores) if h is None]
+        if not misses:
+            return scores  # type: ignore[return-value]
+
+        values = iter(self.compute_batch(misses, parent))
+        for i, (stones_pos, h) in enumerate(zip(stones_list, scores)):
+            if h is None:
+                scores[i] = next(values)
+                cache.put((self.name, stones_pos), scores[i])
+
+        return scores  # type: ignore[return-value]
+
+    @abstractmethod
+    def compute(self, stones_pos: StonesPos) -> float: ...
+
+    def compute_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        return [self.compute(_) for _ in stones_list]
+
+    def cost_matrix(self, stones_pos: StonesPos, *, use_table=True) -> np.ndarray:
+        """Weighted stone x goal distances, goals in LevelContext.goal_cells order.
+        Push distances are gathered from the level table, Manhattan distances are
+        broadcast against the goal coordinates."""
+
+        stones = np.array(list(stones_pos), dtype=np.int64).reshape(-1, 3)
+        return self.costs_of(stones, use_table=use_table)
+
+    def cost_matrices(
+        self, stones_list: list[StonesPos], *, use_table=True
+    ) -> np.ndarray:
+        # cost matrices of many stone sets of the same size, stacked
+        if not stones_list:
+            return np.empty((0, 0, len(self.context.goal_cells)), dtype=np.int64)
+
+        stones = np.array([list(_) for _ in stones_list], dtype=np.int64)
+        return self.costs_of(stones, use_table=use_table)
+
+    def costs_of(self, stones: np.ndarray, *, use_table: bool) -> np.ndarray:
+        # stones is [..., (x, y, w)], the result [..., goal]
+        ctx = self.context
+
+        if use_table:
+            cells = stones[..., 0] * ctx.num_col + stones[..., 1]
+            table = ctx.push_distance_array[:, cells]
+            return np.moveaxis(table, 0, -1) * stones[..., 2:]
+
+        diffs = stones[..., None, :2] - ctx.goal_array
+        return np.abs(diffs).sum(axis=-1) * stones[..., 2:]
+
+    @staticmethod
+    def assignment_cost(costs: np.ndarray) -> float:
+        row_ind, col_ind = linear_sum_assignment(costs)
+        return float(costs[row_ind, col_ind].sum())
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .base import Heuristic
+
+if TYPE_CHECKING:
+    from ..search import StonesPos
+
+
+class ManhattanHeuristic(Heuristic):
+    """Weighted Manhattan distance of every stone to its closest goal."""
+
+    name = "manhattan"
+
+    def compute(self, stones_pos: StonesPos) -> float:
+        costs = self.cost_matrix(stones_pos, use_table=False)
+        return float(costs.min(axis=1).sum())
+
+    def compute_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        costs = self.cost_matrices(stones_list, use_table=False)
+        return costs.min(axis=2).sum(axis=1).astype(float).tolist()
+
+
+class HungarianHeuristic(Heuristic):
+    """Cheapest one-to-one assignment of stones to goals, over weighted Manhattan
+    distances."""
+
+    name = "hungarian"
+
+    def compute(self, stones_pos: StonesPos) -> float:
+        return self.assignment_cost(self.cost_matrix(stones_pos, use_table=False))
+
+    def compute_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        return [
+            self.assignment_cost(costs)
+            for costs in self.cost_matrices(stones_list, use_table=False)
+        ]
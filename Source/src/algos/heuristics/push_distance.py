@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ..assignment import IncrementalHungarian
+from .base import Heuristic
+
+if TYPE_CHECKING:
+    from ..search import Search, StonesPos
+
+
+class PushDistanceHeuristic(Heuristic):
+    """Weighted push distance of every stone to its closest goal, walls and the
+    room the player needs to push included."""
+
+    name = "push"
+
+    def compute(self, stones_pos: StonesPos) -> float:
+        return float(self.cost_matrix(stones_pos).min(axis=1).sum())
+
+    def compute_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        costs = self.cost_matrices(stones_list)
+        return costs.min(axis=2).sum(axis=1).astype(float).tolist()
+
+
+class MatchingHeuristic(Heuristic):
+    """Cheapest one-to-one assignment of stones to goals, over weighted push
+    distances. With `incremental`, a child's assignment is repaired from its
+    parent's rather than solved again."""
+
+    name = "matching"
+
+    def __init__(self, *, incremental: bool = False):
+        self.incremental = incremental
+        self.assignment: IncrementalHungarian | None = None
+
+    def prepare(self, search: Search):
+        super().prepare(search)
+        if self.incremental:
+            self.assignment = IncrementalHungarian(self.context)
+        return self
+
+    def compute(self, stones_pos: StonesPos) -> float:
+        if self.assignment:
+            return self.assignment.evaluate(stones_pos)
+        return self.assignment_cost(self.cost_matrix(stones_pos))
+
+    def compute_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        if self.assignment and parent is not None:
+            return [self.assignment.evaluate_child(parent, _) for _ in stones_list]
+        if self.assignment:
+            return [self.assignment.evaluate(_) for _ in stones_list]
+        return [
+            self.assignment_cost(costs) for costs in self.cost_matrices(stones_list)
+        ]
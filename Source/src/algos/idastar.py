@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from collections.abc import Iterator
+
+from utils.metrics import profile
+
+from .cache import TranspositionTable
+from .search import Point, ProblemState, Search, StonesPosFreeze
+
+
+class IDAStar(Search):
+    """Iterative deepening A*: depth first passes bounded by f, the next bound
+    being the smallest f that went over the last one.
+
+    Only the states of the current path and their siblings are alive, states
+    seen before are remembered in a fixed-size transposition table instead of a
+    closed set, so memory stays flat however many states are searched."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        matrix: list[list[str]],
+        player_pos: Point,
+        stones_pos: StonesPosFreeze,
+        switches_pos: frozenset[Point],
+        use_deadlock: bool = True,
+        use_optimized: bool = True,
+        table_size: int = 1 << 20,
+        **kwargs,
+    ):
+        super().__init__(
+            num_row,
+            num_col,
+            matrix,
+            player_pos,
+            stones_pos,
+            switches_pos,
+            use_deadlock=use_deadlock,
+            use_weight=True,
+            **kwargs,
+        )
+
+        self.use_optimized = use_optimized
+        self.evaluator = self.make_heuristic(use_optimized)
+
+        self.table_size = table_size
+        self.table: TranspositionTable | None = None
+
+        self.initial_state.gval = 0
+        self.initial_state.fval = self.heuristic(frozenset(stones_pos), switches_pos)
+        self.initial_state.with_heuristic = True
+
+    @profile
+    def search(self):
+        self.budget.start()
+
+        table = TranspositionTable(self.table_size)
+        self.table = table
+
+        bound = self.initial_state.fval
+        expanded_count = 0
+        iteration = 0
+        while True:
+            next_bound = float("inf")
+
+            # children left to visit at every depth, hashes of the current path
+            frames: list[Iterator[ProblemState]] = [iter((self.initial_state,))]
+            trail: list[int] = []
+            on_path: set[int] = set()
+            while frames:
+                current_state = next(frames[-1], None)
+                if current_state is None:
+                    frames.pop()
+                    if trail:
+                        on_path.remove(trail.pop())
+                    continue
+
+                if current_state.fval > bound:
+                    next_bound = min(next_bound, current_state.fval)
+                    continue
+
+                if current_state.is_final(self.switches_pos):
+                    path, w = self.construct_path(current_state)
+                    return (path, w, expanded_count, len(table))
+
+                current_hash = hash(current_state)
+                if current_hash in on_path or not table.probe(
+                    current_hash, current_state.gval, iteration
+                ):
+                    continue
+
+                if self.budget.exhausted(expanded_count, len(table)):
+                    return self.budget.result(expanded_count, len(table))
+
+                expanded_count += 1
+
+                trail.append(current_hash)
+                on_path.add(current_hash)
+                frames.append(
+                    iter(
+                        sorted(
+                            self.successors_batch(current_state, self.heuristic_batch)
+                        )
+                    )
+                )
+
+            # nothing went over the bound: every reachable state was searched
+            if next_bound == float("inf"):
+                return "Impossible", 0, expanded_count, len(table)
+
+            bound = next_bound
+            iteration += 1
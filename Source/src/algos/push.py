@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Container
+from typing import TYPE_CHECKING
+
+from constants.enums import Direction
+
+if TYPE_CHECKING:
+    from .context import LevelContext
+
+
+def opposite(d: int):
+    # UP <-> DOWN, LEFT <-> RIGHT
+    return d ^ 1
+
+
+def reachable(ctx: LevelContext, stones: Container[int], start: int):
+    """Flood-fill the player's region from `start`, blocked by walls and stones.
+    Returns cell -> (walking distance, previous cell, direction index taken)."""
+
+    region: dict[int, tuple[int, int, int]] = {start: (0, -1, -1)}
+    q: deque[int] = deque([start])
+    while q:
+        cell = q.popleft()
+        dist = region[cell][0] + 1
+
+        for d, nxt in enumerate(ctx.neighbors[cell]):
+            if nxt >= 0 and nxt not in region and nxt not in stones:
+                region[nxt] = (dist, cell, d)
+                q.append(nxt)
+
+    return region
+
+
+def normalize(ctx: LevelContext, stones: Container[int], start: int):
+    # every position of a region is equivalent for a push-level state, use the lowest
+    return min(reachable(ctx, stones, start))
+
+
+def walk_path(region: dict[int, tuple[int, int, int]], dst: int):
+    movements = [Direction.get_movement(_) for _ in Direction]
+
+    path: list[str] = []
+    while region[dst][1] >= 0:
+        _, dst, d = region[dst]
+        path.append(movements[d])
+
+    return "".join(reversed(path))
+
+
+def pull_sources(ctx: LevelContext):
+    # sources[cell] lists the cells a lone stone is pushed from to land on cell
+    sources: list[list[int]] = [[] for _ in ctx.points]
+    for cell, neighbors in enumerate(ctx.neighbors):
+        for d in range(len(neighbors)):
+            push_from = neighbors[opposite(d)]
+            if push_from >= 0 and ctx.push_targets[push_from][d] >= 0:
+                sources[ctx.push_targets[push_from][d]].append(cell)
+
+    return sources
+
+
+def push_distance_table(ctx: LevelContext, goal_cells: list[int]):
+    """Minimum number of pushes of a lone stone from every cell to every goal,
+    respecting walls and the cell the player must stand on. Unreachable cells get
+    the number of cells, more than any real push distance."""
+
+    sources = pull_sources(ctx)
+
+    table: list[list[int]] = []
+    for goal in goal_cells:
+        unreachable = len(ctx.points)
+        dist = [unreachable] * unreachable
+        dist[goal] = 0
+
+        q: deque[int] = deque([goal])
+        while q:
+            cell = q.popleft()
+            for src in sources[cell]:
+                if dist[src] == unreachable:
+                    dist[src] = dist[cell] + 1
+                    q.append(src)
+
+        table.append(dist)
+
+    return table
+
+
+def goal_regions(ctx: LevelContext, stones: set[int]):
+    """Lowest cell of every player region next to a stone: where the player can
+    stand once the stones are in place, the last move being a push."""
+
+    seen: set[int] = set()
+    regions: list[int] = []
+    for stone in sorted(stones):
+        for start in ctx.neighbors[stone]:
+            if start < 0 or start in stones or start in seen:
+                continue
+
+            region = reachable(ctx, stones, start)
+            seen.update(region)
+            regions.append(min(region))
+
+    return regions
+
+
+def pulls(ctx: LevelContext, stones: set[int], player: int):
+    """Reverse pushes of a position, as (stone, source, direction index, player):
+    pushing the stone on source along the direction gives the position, player
+    being the normalized cell the player stood on before that push."""
+
+    region = reachable(ctx, stones, player)
+    for stone in stones:
+        for d in range(len(ctx.neighbors[stone])):
+            source = ctx.neighbors[stone][opposite(d)]
+            if source not in region:
+                continue
+
+            push_from = ctx.neighbors[source][opposite(d)]
+            if push_from not in region:
+                continue
+
+            yield (
+                stone,
+                source,
+                d,
+                normalize(ctx, (stones - {stone}) | {source}, push_from),
+            )
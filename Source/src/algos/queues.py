@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import heapq
+from collections import deque
+
+
+class BucketQueue[T]:
+    """Dial's priority queue for small non-negative integer keys.
+
+    buckets[key] holds the items pushed with that key and a cursor walks up to
+    the lowest non-empty bucket, so push and pop are O(1) amortized and items are
+    never compared. There is no decrease-key: push the item again under its new
+    key and skip the stale entry when it comes out (lazy deletion)."""
+
+    def __init__(self):
+        self.buckets: list[list[T]] = []
+        self.cursor = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def push(self, key: int, item: T):
+        buckets = self.buckets
+        if key >= len(buckets):
+            buckets.extend([] for _ in range(key + 1 - len(buckets)))
+
+        buckets[key].append(item)
+        self.size += 1
+
+        # uniform-cost keys never go below the cursor, but stay correct if they do
+        self.cursor = min(self.cursor, key)
+
+    def pop(self) -> tuple[int, T]:
+        if not self.size:
+            raise IndexError("pop from an empty bucket queue")
+
+        buckets = self.buckets
+        while not buckets[self.cursor]:
+            self.cursor += 1
+
+        self.size -= 1
+        return self.cursor, buckets[self.cursor].pop()
+
+
+class BucketOpenList[T]:
+    """Best-first open list ordered by lowest f, then deepest g.
+
+    Items are kept in buckets[f][g]; two small heaps hold the distinct f values
+    and, per f, the distinct g values, so popping only compares plain numbers
+    and never calls ProblemState.__lt__. Like BucketQueue, a changed item is
+    pushed again and its stale entry skipped by the caller."""
+
+    def __init__(self):
+        self.buckets: dict[float, dict[float, deque[T]]] = {}
+        self.f_keys: list[float] = []
+        self.g_keys: dict[float, list[float]] = {}
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def push(self, f: float, g: float, item: T):
+        inner = self.buckets.get(f)
+        if inner is None:
+            inner = self.buckets[f] = {}
+            self.g_keys[f] = []
+            heapq.heappush(self.f_keys, f)
+
+        bucket = inner.get(g)
+        if bucket is None:
+            bucket = inner[g] = deque()
+            heapq.heappush(self.g_keys[f], -g)
+
+        bucket.append(item)
+        self.size += 1
+
+    def peek(self) -> tuple[float, float, T]:
+        if not self.size:
+            raise IndexError("peek at an empty open list")
+
+        f = self.f_keys[0]
+        g = -self.g_keys[f][0]
+        return f, g, self.buckets[f][g][0]
+
+    def pop(self) -> tuple[float, float, T]:
+        if not self.size:
+            raise IndexError("pop from an empty open list")
+
+        f = self.f_keys[0]
+        inner = self.buckets[f]
+        g_keys = self.g_keys[f]
+        g = -g_keys[0]
+
+        bucket = inner[g]
+        item = bucket.popleft()
+        self.size -= 1
+
+        if not bucket:
+            del inner[g]
+            heapq.heappop(g_keys)
+
+            if not inner:
+                del self.buckets[f]
+                del self.g_keys[f]
+                heapq.heappop(self.f_keys)
+
+        return f, g, item
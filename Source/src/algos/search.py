@@ -1,31 +1,44 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
-from queue import Queue
 
-from constants.enums import Direction, GridItem
+from constants.enums import Direction, HeuristicType
 from utils.metrics import profile
 
+from .bitboard import BoardIndex, iter_bits
+from .budget import SearchBudget
+from .cache import StateSet
+from .context import LevelContext
+from .heuristics import Heuristic, make_heuristic
+from .push import normalize, opposite, reachable, walk_path
+from .zobrist import ZobristTable
+
 type Point = tuple[int, int]
 type Stone = tuple[int, int, int]
 type StonesPosFreeze = frozenset[Stone]
 type StonesPos = StonesPosFreeze | set[Stone]
+type StonesIndex = dict[Point, Stone]
 type StateHashTable = dict[int, list]
 
 
-def stone_exists(stones_pos: StonesPos, pos: Point):
-    return any((_[0], _[1]) == pos for _ in stones_pos)
-
-
-def get_stone(stones_pos: StonesPos, pos: Point):
-    for _ in stones_pos:
-        if (_[0], _[1]) == pos:
-            return _
-
-    return None
+def stones_index(stones_pos: StonesPos) -> StonesIndex:
+    return {(x, y): (x, y, w) for x, y, w in stones_pos}
 
 
 class ProblemState:
+    __slots__ = (
+        "ancestor",
+        "check_hash",
+        "fval",
+        "gval",
+        "player_pos",
+        "pushed_stone",
+        "stones_pos",
+        "use_weight",
+        "with_heuristic",
+        "zobrist_hash",
+    )
+
     def __init__(
         self,
         ancestor: ProblemState | None,
@@ -37,6 +50,8 @@ class ProblemState:
         pushed_stone: Stone | None = None,
         with_heuristic=False,
         use_weight=False,
+        zobrist_hash: int | None = None,
+        check_hash: int | None = None,
     ):
         self.ancestor = ancestor
 
@@ -55,6 +70,10 @@ class ProblemState:
         self.with_heuristic = with_heuristic
         self.use_weight = use_weight
 
+        # cached hashes, derived incrementally from the ancestor by Search.go
+        self.zobrist_hash = zobrist_hash
+        self.check_hash = check_hash
+
     def __lt__(self, state: ProblemState):
         if not self.with_heuristic:
             return self.gval < state.gval
@@ -78,6 +97,9 @@ class ProblemState:
         return self_stones == state_stones
 
     def __hash__(self):
+        if self.zobrist_hash is not None:
+            return self.zobrist_hash
+
         return hash(
             (
                 self.player_pos,
@@ -100,135 +122,90 @@ class ProblemState:
         return False
 
 
-class DeadlockDetect:
-    @staticmethod
-    def has_simple_deadlock(
-        matrix: list[list[str]],
-        num_row: int,
-        num_col: int,
-        switches_pos: frozenset[Point],
+class BitboardState(ProblemState):
+    """Compact state: player is a cell index of `board`, stones are a bitmask plus
+    the weights of the stones in ascending cell order."""
+
+    __slots__ = ("board", "player", "stones_mask", "stones_weights")
+
+    def __init__(
+        self,
+        ancestor: BitboardState | None,
+        board: BoardIndex,
+        player: int,
+        stones_mask: int,
+        stones_weights: tuple[int, ...],
+        gval: int = -1,
+        fval: float = -1,
+        *,
+        pushed_stone: Stone | None = None,
+        with_heuristic=False,
+        use_weight=False,
+        zobrist_hash: int | None = None,
+        check_hash: int | None = None,
     ):
-        reachable = [[False] * num_col for _ in range(num_row)]
+        self.ancestor = ancestor
 
-        q: Queue[Point] = Queue()
-        dir_vecs = Direction.get_vec_list()
-        for g in switches_pos:
-            q.put(g)
-            reachable[g[0]][g[1]] = True
-
-            for dx, dy in dir_vecs:
-                nx, ny = g[0] + dx, g[1] + dy
-
-                if (
-                    0 <= nx < num_row
-                    and 0 <= ny < num_col
-                    and matrix[nx][ny] != GridItem.get_char(GridItem.WALL)
-                ):
-                    q.put((nx, ny))
-                    reachable[nx][ny] = True
-
-        dir_vecs = [(2 * _[0], 2 * _[1]) for _ in dir_vecs]
-        while not q.empty():
-            x, y = q.get()
-
-            for dx, dy in dir_vecs:
-                nx, ny = x + dx // 2, y + dy // 2
-                tx, ty = x + dx, y + dy
-
-                if (
-                    0 <= tx < num_row
-                    and 0 <= ty < num_col
-                    and matrix[nx][ny] != GridItem.get_char(GridItem.WALL)
-                    and matrix[tx][ty] != GridItem.get_char(GridItem.WALL)
-                    and not reachable[nx][ny]
-                ):
-                    q.put((nx, ny))
-                    reachable[nx][ny] = True
-
-        return [[not cell for cell in row] for row in reachable]
-
-    @staticmethod
-    def has_freeze_deadlock(
-        pos: Point,
-        matrix: list[list[str]],
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-        has_simple_deadlock: list[list[bool]],
-        checked_list: set[Point],
+        self.board = board
+        self.player = player
+        self.stones_mask = stones_mask
+        self.stones_weights = stones_weights
+
+        self.gval = gval
+        self.fval = fval if with_heuristic else gval
+
+        self.pushed_stone = pushed_stone
+
+        self.with_heuristic = with_heuristic
+        self.use_weight = use_weight
+
+        self.zobrist_hash = zobrist_hash
+        self.check_hash = check_hash
+
+    @classmethod
+    def from_positions(
+        cls,
+        board: BoardIndex,
+        player_pos: Point,
+        stones_pos: StonesPos,
+        *,
+        use_weight=False,
     ):
-        # mark new position as being checked
-        checked_list.add(pos)
-
-        # The stone is blocked along the vertical axis when one of the following checks are true:
-        #     If there is a wall on the left or on the right side of the stone then the stone is blocked along this axis
-        #     If there is a simple deadlock square on both sides (left and right) of the stone the stone is blocked along this axis
-        #     If there is a stone one the left or right side then this stone is blocked if the other stone is blocked.
-        x, y = pos
-        x_axis_freeze = DeadlockDetect.check_axis(
-            x,
-            y,
-            matrix,
-            stones_pos,
-            switches_pos,
-            has_simple_deadlock,
-            checked_list,
-            axis="x",
-        )
-        y_axis_freeze = DeadlockDetect.check_axis(
-            x,
-            y,
-            matrix,
-            stones_pos,
-            switches_pos,
-            has_simple_deadlock,
-            checked_list,
-            axis="y",
+        mask, weights = board.encode_stones(stones_pos)
+        return cls(
+            None, board, board.index[player_pos], mask, weights, use_weight=use_weight
         )
 
-        if not x_axis_freeze or not y_axis_freeze:
-            return False
+    @property
+    def player_pos(self) -> Point:
+        return self.board.cells[self.player]
 
-        # If the new stone position doesn't make a goal state, we accept this situation as freeze deadlock
-        return any(stone not in switches_pos for stone in checked_list)
+    @property
+    def stones_pos(self) -> StonesPosFreeze:
+        return self.board.decode_stones(self.stones_mask, self.stones_weights)
 
-    @staticmethod
-    def check_axis(
-        x: int,
-        y: int,
-        matrix: list[list[str]],
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-        has_simple_deadlock: list[list[bool]],
-        checked_list: set[Point],
-        axis: str,
-    ):
-        dir_vecs = ((1, 0), (-1, 0)) if axis == "x" else ((0, 1), (0, -1))
-        simple_dl_count = 0
+    def __eq__(self, state: object):
+        if not isinstance(state, BitboardState):
+            return NotImplemented
 
-        for dx, dy in dir_vecs:
-            nx, ny = x + dx, y + dy
+        return (
+            self.player == state.player
+            and self.stones_mask == state.stones_mask
+            and (not self.use_weight or self.stones_weights == state.stones_weights)
+        )
 
-            if matrix[nx][ny] == GridItem.get_char(GridItem.WALL):
-                return True
+    def __hash__(self):
+        if self.zobrist_hash is not None:
+            return self.zobrist_hash
 
-            if has_simple_deadlock[nx][ny]:
-                simple_dl_count += 1
-                if simple_dl_count == 2:
-                    return True
-                continue
-
-            if stone_exists(stones_pos, (nx, ny)):
-                if (nx, ny) in checked_list or DeadlockDetect.has_freeze_deadlock(
-                    (nx, ny),
-                    matrix,
-                    stones_pos,
-                    switches_pos,
-                    has_simple_deadlock,
-                    checked_list.copy(),
-                ):
-                    return True
+        return hash(
+            (self.player, self.stones_mask, self.stones_weights)
+            if self.use_weight
+            else (self.player, self.stones_mask)
+        )
 
-        return False
+    def is_final(self, switches_pos: frozenset[Point] | None = None):
+        return self.stones_mask == self.board.goal_mask
 
 
 class Search(ABC):
@@ -243,6 +220,15 @@ class Search(ABC):
         *,
         use_deadlock: bool = True,
         use_weight: bool = False,
+        use_bitboard: bool = False,
+        use_push_level: bool = False,
+        use_corral: bool = False,
+        use_matching: bool = False,
+        use_incremental: bool = False,
+        use_compact: bool = False,
+        heuristic: str | HeuristicType | Heuristic | None = None,
+        context: LevelContext | None = None,
+        budget: SearchBudget | None = None,
     ):
         self.num_row = num_row
         self.num_col = num_col
@@ -250,81 +236,297 @@ class Search(ABC):
 
         self.switches_pos = frozenset(switches_pos)
 
+        # static level data, pass the same context to every algorithm of a level
+        self.context = context or LevelContext(
+            num_row, num_col, matrix, self.switches_pos
+        )
+
         self.use_weight = use_weight
-        self.initial_state = ProblemState(None, player_pos, stones_pos)
+
+        # no limits unless given, every search() restarts the clock
+        self.budget = budget or SearchBudget()
+
+        self.use_bitboard = use_bitboard
+        self.board = self.context.board if use_bitboard else None
+
+        self.zobrist = ZobristTable(
+            num_row, num_col, (s[2] for s in stones_pos), use_weight=use_weight
+        )
+
+        # closed sets of packed keys, made of the Zobrist hash and a second one
+        # drawn independently so that two states almost never share both
+        self.use_compact = use_compact
+        self.check_zobrist = (
+            ZobristTable(
+                num_row, num_col, (s[2] for s in stones_pos), use_weight=use_weight
+            )
+            if use_compact
+            else None
+        )
+
+        # push-level states only expand pushes, their player is the lowest cell of
+        # the region it can walk to; the real start is kept to replay the walks
+        self.use_push_level = use_push_level
+        self.player_start = player_pos
+        if use_push_level:
+            player_pos = self.context.points[
+                normalize(
+                    self.context,
+                    {self.context.cell(s[:2]) for s in stones_pos},
+                    self.context.cell(player_pos),
+                )
+            ]
+
+        self.initial_state = self.hashed(
+            BitboardState.from_positions(
+                self.board, player_pos, stones_pos, use_weight=use_weight
+            )
+            if self.board
+            else ProblemState(None, player_pos, stones_pos, use_weight=use_weight)
+        )
 
         self.use_deadlock = use_deadlock
-        self.has_simple_deadlock = DeadlockDetect.has_simple_deadlock(
-            self.matrix, self.num_row, self.num_col, self.switches_pos
+        self.use_corral = use_corral
+        self.use_matching = use_matching
+
+        # informed searches set their evaluator with make_heuristic()
+        self.heuristic_type = heuristic
+        self.use_incremental = use_incremental
+        self.evaluator: Heuristic | None = None
+
+        self.has_simple_deadlock = self.context.has_simple_deadlock
+
+        # cell -> stone index and flat cells bitmask of the last state being expanded
+        self.indexed_state: ProblemState | None = None
+        self.indexed_stones: StonesIndex = {}
+        self.masked_state: ProblemState | None = None
+        self.masked_stones = 0
+        self.matched_state: ProblemState | None = None
+        self.matched_goals: list[int] | None = None
+
+    def hashed[T: ProblemState](self, state: T) -> T:
+        # states built outside of go() must share the Zobrist hashing of this search
+        state.zobrist_hash = self.zobrist.hash_state(state.player_pos, state.stones_pos)
+        return state
+
+    def hash_of(self, state: ProblemState) -> int:
+        if state.zobrist_hash is None:
+            self.hashed(state)
+        return state.zobrist_hash  # type: ignore[return-value]
+
+    def hash_move(
+        self,
+        current_state: ProblemState,
+        player_from: Point,
+        player_to: Point,
+        stone_from: Point | None = None,
+        stone_to: Point | None = None,
+        w: int = 0,
+    ) -> tuple[int, int | None]:
+        # the Zobrist hash of a child, and its second hash when keys are packed
+        move = (player_from, player_to, stone_from, stone_to, w)
+        zobrist_hash = self.zobrist.hash_move(self.hash_of(current_state), *move)
+        if not self.check_zobrist:
+            return zobrist_hash, None
+        return zobrist_hash, self.check_zobrist.hash_move(
+            self.check_of(current_state), *move
         )
 
+    def check_of(self, state: ProblemState) -> int:
+        assert self.check_zobrist
+        if state.check_hash is None:
+            state.check_hash = self.check_zobrist.hash_state(
+                state.player_pos, state.stones_pos
+            )
+        return state.check_hash
+
+    def key_of(self, state: ProblemState) -> int:
+        return self.hash_of(state) << 64 | self.check_of(state)
+
+    def closed_set(self) -> set[ProblemState] | StateSet[ProblemState]:
+        return StateSet(self.key_of) if self.use_compact else set()
+
+    def stones_index(self, state: ProblemState) -> StonesIndex:
+        # can_go()/go() probe the same state for every direction, so the index is
+        # built once per expansion rather than stored on every state in memory
+        if self.indexed_state is not state:
+            self.indexed_state = state
+            self.indexed_stones = stones_index(state.stones_pos)
+        return self.indexed_stones
+
+    def stones_cells(self, state: ProblemState) -> int:
+        if self.masked_state is not state:
+            self.masked_state = state
+
+            mask = 0
+            if isinstance(state, BitboardState):
+                flat = state.board.flat
+                for idx in iter_bits(state.stones_mask):
+                    mask |= 1 << flat[idx]
+            else:
+                for stone in state.stones_pos:
+                    mask |= 1 << self.context.cell(stone[:2])
+            self.masked_stones = mask
+
+        return self.masked_stones
+
+    def matched_goals_of(self, state: ProblemState) -> list[int] | None:
+        # stone cell matched to every goal, left in the matching table by the
+        # can_push() that generated the state, or found from scratch for the root
+        if self.matched_state is not state:
+            self.matched_state = state
+            self.matched_goals = self.context.matching.match(self.stones_cells(state))
+        return self.matched_goals
+
     def can_go(self, current_state: ProblemState, dir: Direction):
-        x, y = current_state.player_pos
+        if self.board:
+            return self.can_go_bitboard(current_state, dir)
 
-        if dir == Direction.UP and x <= 1:
-            return False
-        if dir == Direction.DOWN and x >= self.num_row - 2:
-            return False
-        if dir == Direction.LEFT and y <= 1:
+        ctx = self.context
+        d = dir.value[0]
+
+        cell = ctx.cell(current_state.player_pos)
+        nxt = ctx.neighbors[cell][d]
+        if nxt < 0:
             return False
-        if dir == Direction.RIGHT and y >= self.num_col - 2:
+
+        stones_pos = self.stones_index(current_state)
+        stone = stones_pos.get(ctx.points[nxt])
+        if not stone:
+            return True
+
+        return self.can_push(current_state, nxt, ctx.push_targets[cell][d])
+
+    def can_push(self, current_state: ProblemState, cell: int, target_cell: int):
+        ctx = self.context
+        stones = self.stones_cells(current_state)
+
+        if target_cell < 0 or (stones >> target_cell) & 1:
             return False
 
-        axis_x, axis_y = Direction.get_vec(dir)
+        if not self.use_deadlock:
+            return True
 
-        t1 = self.matrix[x + axis_x][y + axis_y]
-        t2 = (
-            self.matrix[x + (2 * axis_x)][y + (2 * axis_y)] if self.use_deadlock else ""
-        )
+        if ctx.dead[target_cell]:
+            return False
 
-        if t1 == GridItem.get_char(GridItem.WALL):
+        new_stones = stones ^ (1 << cell) ^ (1 << target_cell)
+        if ctx.freeze.is_frozen(target_cell, new_stones):
             return False
 
-        stones_pos = current_state.stones_pos
-        if stone_exists(stones_pos, (x + axis_x, y + axis_y)):
-            if self.use_deadlock:
-                if (
-                    t2 == GridItem.get_char(GridItem.WALL)
-                    or stone_exists(stones_pos, (x + (2 * axis_x), y + (2 * axis_y)))
-                    or self.has_simple_deadlock[x + (2 * axis_x)][y + (2 * axis_y)]
-                ):
-                    return False
-
-            new_stones_pos = set(stones_pos)
-            stone = get_stone(stones_pos, (x + axis_x, y + axis_y))
-            if stone:
-                new_stones_pos.remove(stone)
-                new_stones_pos.add((x + (2 * axis_x), y + (2 * axis_y), stone[2]))
-
-            if self.use_deadlock and DeadlockDetect.has_freeze_deadlock(
-                (x + (2 * axis_x), y + (2 * axis_y)),
-                self.matrix,
-                frozenset(new_stones_pos),
-                self.switches_pos,
-                self.has_simple_deadlock,
-                set(),
+        if self.use_matching:
+            owner = self.matched_goals_of(current_state)
+            if (
+                owner is None
+                or ctx.matching.push(owner, stones, cell, target_cell) is None
             ):
                 return False
 
-        return True
+        # the player ends up on the cell the stone was pushed from
+        return not (self.use_corral and ctx.corral.is_deadlocked(new_stones, cell))
+
+    def can_go_bitboard(self, current_state: BitboardState, dir: Direction):
+        board = current_state.board
+        mask = current_state.stones_mask
+
+        nxt = board.neighbors[current_state.player][dir.value[0]]
+        if nxt < 0:
+            return False
+
+        if not (mask >> nxt) & 1:
+            return True
+
+        target = board.neighbors[nxt][dir.value[0]]
+        if target < 0:
+            return False
+
+        return self.can_push(current_state, board.flat[nxt], board.flat[target])
+
+    def go_bitboard(
+        self, current_state: BitboardState, dir: Direction, *, heuristic=None
+    ):
+        board = current_state.board
+        mask = current_state.stones_mask
+        weights = current_state.stones_weights
+
+        nxt = board.neighbors[current_state.player][dir.value[0]]
+
+        stone = None
+        target_pos = None
+        if (mask >> nxt) & 1:
+            target = board.neighbors[nxt][dir.value[0]]
+            mask, weights, w = board.move_stone(mask, weights, nxt, target)
+            stone = (*board.cells[nxt], w)
+            target_pos = board.cells[target]
+
+        zobrist_hash, check_hash = self.hash_move(
+            current_state,
+            board.cells[current_state.player],
+            board.cells[nxt],
+            stone[:2] if stone else None,
+            target_pos,
+            stone[2] if stone else 0,
+        )
+
+        gval = current_state.gval
+        fval = current_state.fval
+        if heuristic or self.use_weight:
+            gval += stone[2] if stone else 1
+            fval = gval + (
+                heuristic(board.decode_stones(mask, weights), self.switches_pos)
+                if heuristic
+                else 0
+            )
+
+        return BitboardState(
+            current_state,
+            board,
+            nxt,
+            mask,
+            weights,
+            gval,
+            fval,
+            pushed_stone=stone,
+            with_heuristic=bool(heuristic),
+            use_weight=self.use_weight,
+            zobrist_hash=zobrist_hash,
+            check_hash=check_hash,
+        )
 
     def go(self, current_state: ProblemState, dir: Direction, *, heuristic=None):
-        x, y = current_state.player_pos
-        axis_x, axis_y = Direction.get_vec(dir)
+        if self.board:
+            return self.go_bitboard(current_state, dir, heuristic=heuristic)
+
+        ctx = self.context
+        d = dir.value[0]
+
+        cell = ctx.cell(current_state.player_pos)
+        player_pos = ctx.points[ctx.neighbors[cell][d]]
 
         new_stone_pos = set(current_state.stones_pos)
-        stone = get_stone(current_state.stones_pos, (x + axis_x, y + axis_y))
+        stone = self.stones_index(current_state).get(player_pos)
+        target = None
         if stone:
+            target = ctx.points[ctx.push_targets[cell][d]]
             new_stone_pos.remove(stone)
-            new_stone_pos.add((stone[0] + axis_x, stone[1] + axis_y, stone[2]))
+            new_stone_pos.add((*target, stone[2]))
         new_stone_pos = frozenset(new_stone_pos)
 
+        zobrist_hash, check_hash = self.hash_move(
+            current_state,
+            current_state.player_pos,
+            player_pos,
+            stone[:2] if stone else None,
+            target,
+            stone[2] if stone else 0,
+        )
+
         if heuristic or self.use_weight:
             gval = current_state.gval + (stone[2] if stone else 1)
 
             return ProblemState(
                 current_state,
-                (x + axis_x, y + axis_y),
+                player_pos,
                 new_stone_pos,
                 gval,
                 (
@@ -334,18 +536,200 @@ class Search(ABC):
                 pushed_stone=stone,
                 with_heuristic=bool(heuristic),
                 use_weight=self.use_weight,
+                zobrist_hash=zobrist_hash,
+                check_hash=check_hash,
             )
 
         return ProblemState(
             current_state,
-            (x + axis_x, y + axis_y),
+            player_pos,
             new_stone_pos,
             pushed_stone=stone,
             with_heuristic=False,
             use_weight=self.use_weight,
+            zobrist_hash=zobrist_hash,
+            check_hash=check_hash,
         )
 
+    def successors(self, current_state: ProblemState, *, heuristic=None):
+        if self.use_push_level:
+            yield from self.push_successors(current_state, heuristic=heuristic)
+            return
+
+        for dir in Direction:
+            if self.can_go(current_state, dir):
+                yield self.go(current_state, dir, heuristic=heuristic)
+
+    def successors_batch(self, current_state: ProblemState, heuristic_batch):
+        # score every child of one expansion with a single heuristic call
+        children = list(self.successors(current_state))
+
+        scores = heuristic_batch(
+            [child.stones_pos for child in children], parent=current_state.stones_pos
+        )
+        for child, h in zip(children, scores):
+            child.fval = child.gval + h
+            child.with_heuristic = True
+
+        return children
+
+    def make_heuristic(self, use_optimized: bool = True) -> Heuristic:
+        # the heuristic given to the search, or the assignment over push distances
+        # (Manhattan distance when not optimized)
+        heuristic = self.heuristic_type or (
+            HeuristicType.MATCHING if use_optimized else HeuristicType.MANHATTAN
+        )
+        return make_heuristic(heuristic, incremental=self.use_incremental).prepare(self)
+
+    def heuristic(
+        self, stones_pos: StonesPos, switches_pos: frozenset[Point] | None = None
+    ) -> float:
+        return self.evaluator.evaluate(stones_pos)  # type: ignore[union-attr]
+
+    def heuristic_batch(
+        self, stones_list: list[StonesPos], parent: StonesPos | None = None
+    ) -> list[float]:
+        return self.evaluator.evaluate_batch(stones_list, parent)  # type: ignore[union-attr]
+
+    def player_of(self, state: ProblemState) -> Point:
+        # where the player really stands in a push-level state: on the pushed cell
+        return state.pushed_stone[:2] if state.pushed_stone else self.player_start
+
+    def push_successors(self, current_state: ProblemState, *, heuristic=None):
+        ctx = self.context
+
+        stones_pos = self.stones_index(current_state)
+        stone_cells = {ctx.cell(pos) for pos in stones_pos}
+        region = reachable(ctx, stone_cells, ctx.cell(self.player_of(current_state)))
+
+        for stone in stones_pos.values():
+            cell = ctx.cell(stone[:2])
+
+            for d in range(len(ctx.neighbors[cell])):
+                push_from = ctx.neighbors[cell][opposite(d)]
+                if push_from not in region:
+                    continue
+
+                target_cell = ctx.push_targets[push_from][d]
+                if not self.can_push(current_state, cell, target_cell):
+                    continue
+
+                yield self.push(
+                    current_state,
+                    stone,
+                    target_cell,
+                    region[push_from][0],
+                    stone_cells,
+                    heuristic=heuristic,
+                )
+
+    def push(
+        self,
+        current_state: ProblemState,
+        stone: Stone,
+        target_cell: int,
+        walk: int,
+        stone_cells: set[int],
+        *,
+        heuristic=None,
+    ):
+        ctx = self.context
+
+        cell = ctx.cell(stone[:2])
+        target = ctx.points[target_cell]
+        player_pos = ctx.points[
+            normalize(ctx, (stone_cells - {cell}) | {target_cell}, cell)
+        ]
+
+        zobrist_hash, check_hash = self.hash_move(
+            current_state,
+            current_state.player_pos,
+            player_pos,
+            stone[:2],
+            target,
+            stone[2],
+        )
+
+        gval = current_state.gval
+        if heuristic or self.use_weight:
+            gval += walk + stone[2]
+
+        if self.board:
+            board = self.board
+            mask, weights, _ = board.move_stone(
+                current_state.stones_mask,
+                current_state.stones_weights,
+                board.index[stone[:2]],
+                board.index[target],
+            )
+            new_state = BitboardState(
+                current_state,
+                board,
+                board.index[player_pos],
+                mask,
+                weights,
+                gval,
+                pushed_stone=stone,
+                with_heuristic=bool(heuristic),
+                use_weight=self.use_weight,
+                zobrist_hash=zobrist_hash,
+                check_hash=check_hash,
+            )
+        else:
+            new_state = ProblemState(
+                current_state,
+                player_pos,
+                (current_state.stones_pos - {stone}) | {(*target, stone[2])},
+                gval,
+                pushed_stone=stone,
+                with_heuristic=bool(heuristic),
+                use_weight=self.use_weight,
+                zobrist_hash=zobrist_hash,
+                check_hash=check_hash,
+            )
+
+        if heuristic:
+            new_state.fval = gval + heuristic(new_state.stones_pos, self.switches_pos)
+
+        return new_state
+
+    def construct_push_path(self, state: ProblemState):
+        ctx = self.context
+        pushings = [Direction.get_pushing(_) for _ in Direction]
+        dir_vecs = Direction.get_vec_list()
+
+        states: list[ProblemState] = []
+        while state.ancestor:
+            states.append(state)
+            state = state.ancestor
+
+        path = ""
+        tot_w = 0
+
+        player = ctx.cell(self.player_start)
+        for state in reversed(states):
+            stone = state.pushed_stone
+            assert state.ancestor and stone
+
+            stone_cells = {ctx.cell(s[:2]) for s in state.ancestor.stones_pos}
+            (target,) = {ctx.cell(s[:2]) for s in state.stones_pos} - stone_cells
+            tx, ty = ctx.points[target]
+
+            d = dir_vecs.index((tx - stone[0], ty - stone[1]))
+            push_from = ctx.neighbors[ctx.cell(stone[:2])][opposite(d)]
+
+            path += walk_path(reachable(ctx, stone_cells, player), push_from)
+            path += pushings[d]
+            tot_w += stone[2]
+
+            player = ctx.cell(stone[:2])
+
+        return path, tot_w
+
     def construct_path(self, state: ProblemState):
+        if self.use_push_level:
+            return self.construct_push_path(state)
+
         path = ""
         tot_w = 0
 
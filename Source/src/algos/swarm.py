@@ -4,13 +4,16 @@ import heapq
 import random
 
 import numpy as np
-from scipy.optimize import linear_sum_assignment
 
-from constants.enums import Direction
-from utils.base import manhattan
 from utils.metrics import profile
 
-from .search import Point, ProblemState, Search, StonesPos, StonesPosFreeze
+from .search import (
+    BitboardState,
+    Point,
+    ProblemState,
+    Search,
+    StonesPos,
+)
 
 
 class Swarm(Search):
@@ -24,6 +27,7 @@ class Swarm(Search):
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
         use_optimized: bool = True,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -34,60 +38,19 @@ class Swarm(Search):
             switches_pos,
             use_deadlock=use_deadlock,
             use_weight=True,
+            **kwargs,
         )
 
         self.use_optimized = use_optimized
-
-    def heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        return (
-            self.hungarian_heuristic(stones_pos, switches_pos)
-            if self.use_optimized
-            else self.manhattan_heuristic(stones_pos, switches_pos)
-        )
-
-    def manhattan_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        total_cost = 0
-        for stone in stones_pos:
-            total_cost += stone[2] * min(
-                [
-                    manhattan(stone[0], stone[1], switch[0], switch[1])
-                    for switch in switches_pos
-                ]
-            )
-        return total_cost
-
-    def hungarian_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        dists = np.zeros((len(stones_pos), len(switches_pos)))
-
-        for i, (sx, sy, w) in enumerate(stones_pos):
-            for j, (gx, gy) in enumerate(switches_pos):
-                dists[i, j] = w * manhattan(sx, sy, gx, gy)
-
-        row_ind, col_ind = linear_sum_assignment(dists)
-        return dists[row_ind, col_ind].sum()
+        self.evaluator = self.make_heuristic(use_optimized)
 
     def get_neighbors(self, state: ProblemState):
-        neighbors = []
-        for dir in Direction:
-            if self.can_go(state, dir):
-                new_state = self.go(state, dir, heuristic=self.heuristic)
-                neighbors.append(new_state)
-        return neighbors
+        return self.successors_batch(state, self.heuristic_batch)
 
     @profile
     def search(self):
+        self.budget.start()
+
         open_set = []
         heapq.heappush(open_set, (0, self.initial_state))
 
@@ -110,6 +73,9 @@ class Swarm(Search):
             if state_hash_table[current_hash][0] != current_state:
                 continue
 
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
+
             state_hash_table[current_hash][1] = False
             expanded_count += 1
 
@@ -118,7 +84,8 @@ class Swarm(Search):
                 new_distance = current_state.gval + (
                     neighbor.pushed_stone[2] if neighbor.pushed_stone else 1
                 )
-                h_score = self.heuristic(neighbor.stones_pos, self.switches_pos)
+                # successors_batch() already scored the neighbor
+                h_score = neighbor.fval - neighbor.gval
 
                 if neighbor not in closed:
                     f_score = new_distance + h_score
@@ -153,6 +120,8 @@ class Swarm(Search):
 class SwarmConvergent(Swarm):
     @profile
     def search(self):
+        self.budget.start()
+
         open_set = []
         heapq.heappush(open_set, (0, self.initial_state))
         closed: set[ProblemState] = set()
@@ -171,9 +140,12 @@ class SwarmConvergent(Swarm):
                     len(closed),
                 )
 
+            if self.budget.exhausted(expanded_count, len(closed)):
+                return self.budget.result(expanded_count, len(closed))
+
             for neighbor in self.get_neighbors(current_state):
                 if neighbor not in closed:
-                    cost = self.heuristic(neighbor.stones_pos, self.switches_pos)
+                    cost = neighbor.fval - neighbor.gval
                     heapq.heappush(open_set, (cost, neighbor))
                     closed.add(neighbor)
 
@@ -193,7 +165,11 @@ class SwarmBidirectional(Swarm):
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
         use_optimized: bool = True,
+        **kwargs,
     ):
+        # the backward half moves from the goals with the player where it starts
+        # and its path is replayed reversed, which push-level states cannot do
+        kwargs.pop("use_push_level", None)
         super().__init__(
             num_row,
             num_col,
@@ -203,21 +179,33 @@ class SwarmBidirectional(Swarm):
             switches_pos,
             use_deadlock,
             use_optimized,
+            **kwargs,
         )
 
         # Initialize goal state
-        self.goal_state = ProblemState(
-            None,
-            player_pos,
-            frozenset((x, y, w) for (x, y), (_, _, w) in zip(switches_pos, stones_pos)),
-            with_heuristic=True,
-            use_weight=True,
+        goal_stones_pos = frozenset(
+            (x, y, w) for (x, y), (_, _, w) in zip(switches_pos, stones_pos)
+        )
+        self.goal_state = self.hashed(
+            BitboardState.from_positions(
+                self.board, player_pos, goal_stones_pos, use_weight=True
+            )
+            if self.board
+            else ProblemState(
+                None,
+                player_pos,
+                goal_stones_pos,
+                with_heuristic=True,
+                use_weight=True,
+            )
         )
         self.goal_state.gval = 0
         self.goal_state.fval = 0
 
     @profile
     def search(self):
+        self.budget.start()
+
         forward_open_set = []
         backward_open_set = []
 
@@ -269,17 +257,24 @@ class SwarmBidirectional(Swarm):
                     len(forward_closed) + len(backward_closed),
                 )
 
+            if self.budget.exhausted(
+                expanded_count, len(forward_closed) + len(backward_closed)
+            ):
+                return self.budget.result(
+                    expanded_count, len(forward_closed) + len(backward_closed)
+                )
+
             if forward_state:
                 for neighbor in self.get_neighbors(forward_state):
                     if neighbor not in forward_closed:
-                        cost = self.heuristic(neighbor.stones_pos, self.switches_pos)
+                        cost = neighbor.fval - neighbor.gval
                         heapq.heappush(forward_open_set, (cost, neighbor))
                         forward_closed.add(neighbor)
 
             if backward_state:
                 for neighbor in self.get_neighbors(backward_state):
                     if neighbor not in backward_closed:
-                        cost = self.heuristic(neighbor.stones_pos, self.switches_pos)
+                        cost = neighbor.fval - neighbor.gval
                         heapq.heappush(backward_open_set, (cost, neighbor))
                         backward_closed.add(neighbor)
 
@@ -309,6 +304,7 @@ class AntColonyOptimization(Search):
         beta: float = 2.0,
         evaporation_rate: float = 0.5,
         iterations: int = 100,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -319,9 +315,11 @@ class AntColonyOptimization(Search):
             switches_pos,
             use_deadlock=use_deadlock,
             use_weight=True,
+            **kwargs,
         )
 
         self.use_optimized = use_optimized
+        self.evaluator = self.make_heuristic(use_optimized)
         self.num_ants = num_ants
         self.alpha = alpha
         self.beta = beta
@@ -329,51 +327,8 @@ class AntColonyOptimization(Search):
         self.iterations = iterations
         self.pheromone = np.ones((num_row, num_col))
 
-    def heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        return (
-            self.hungarian_heuristic(stones_pos, switches_pos)
-            if self.use_optimized
-            else self.manhattan_heuristic(stones_pos, switches_pos)
-        )
-
-    def manhattan_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        total_cost = 0
-        for stone in stones_pos:
-            total_cost += stone[2] * min(
-                manhattan(stone[0], stone[1], switch[0], switch[1])
-                for switch in switches_pos
-            )
-        return total_cost
-
-    def hungarian_heuristic(
-        self,
-        stones_pos: StonesPosFreeze,
-        switches_pos: frozenset[Point],
-    ):
-        dists = np.zeros((len(stones_pos), len(switches_pos)))
-
-        for i, (sx, sy, w) in enumerate(stones_pos):
-            for j, (gx, gy) in enumerate(switches_pos):
-                dists[i, j] = w * manhattan(sx, sy, gx, gy)
-
-        row_ind, col_ind = linear_sum_assignment(dists)
-        return dists[row_ind, col_ind].sum()
-
     def get_neighbors(self, state: ProblemState):
-        neighbors = []
-        for dir in Direction:
-            if self.can_go(state, dir):
-                new_state = self.go(state, dir)
-                neighbors.append(new_state)
-        return neighbors
+        return list(self.successors(state))
 
     def choose_next_move(self, state: ProblemState, neighbors: list[ProblemState]):
         probabilities = []
@@ -408,6 +363,8 @@ class AntColonyOptimization(Search):
 
     @profile
     def search(self):
+        self.budget.start()
+
         closed: set[ProblemState] = set()
         closed.add(self.initial_state)
 
@@ -424,6 +381,10 @@ class AntColonyOptimization(Search):
                 cost = 0
 
                 while not state.is_final(self.switches_pos):
+                    # ants walk until they are stuck, the budget also bounds a walk
+                    if self.budget.exhausted(expanded_count, len(closed)):
+                        break
+
                     neighbors = self.get_neighbors(state)
                     if not neighbors:
                         break
@@ -442,6 +403,11 @@ class AntColonyOptimization(Search):
             self.update_pheromone(paths)
 
             expanded_count += 1
+            if self.budget.exceeded:
+                break
+
+        if self.budget.exceeded and not best_path:
+            return self.budget.result(expanded_count, len(closed))
 
         return (
             best_path if best_path else "Impossible",
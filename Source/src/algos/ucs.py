@@ -1,10 +1,8 @@
 from __future__ import annotations
 
-import heapq
-
-from constants.enums import Direction
 from utils.metrics import profile
 
+from .queues import BucketQueue
 from .search import Point, ProblemState, Search, StateHashTable, StonesPosFreeze
 
 
@@ -18,6 +16,7 @@ class UCS(Search):
         stones_pos: StonesPosFreeze,
         switches_pos: frozenset[Point],
         use_deadlock: bool = True,
+        **kwargs,
     ):
         super().__init__(
             num_row,
@@ -28,6 +27,7 @@ class UCS(Search):
             switches_pos,
             use_deadlock=use_deadlock,
             use_weight=True,
+            **kwargs,
         )
 
         self.initial_state.gval = 0
@@ -36,30 +36,48 @@ class UCS(Search):
         self,
         new_state: ProblemState,
         closed: set[ProblemState],
-        frontier: list[ProblemState],
+        frontier: BucketQueue[ProblemState],
         state_hash_table: StateHashTable,
     ):
         id = hash(new_state)
 
         if new_state not in closed:
-            heapq.heappush(frontier, new_state)
+            frontier.push(new_state.gval, new_state)
             closed.add(new_state)
             state_hash_table[id] = [new_state, True]
             return
 
-        if new_state.gval < state_hash_table[id][0].gval:
-            state_hash_table[id][0].gval = new_state.gval
-            state_hash_table[id][0].ancestor = new_state.ancestor
-            state_hash_table[id][0].pushed_stone = new_state.pushed_stone
+        state = state_hash_table[id][0]
+        if new_state.gval < state.gval:
+            state.gval = new_state.gval
+            state.ancestor = new_state.ancestor
+            state.pushed_stone = new_state.pushed_stone
+
+            # file it again under its new cost, the old entry is skipped when popped
+            state_hash_table[id][1] = True
+            frontier.push(state.gval, state)
+
+    def begin(self):
+        self.budget.start()
+
+    def stop_at(self, goal: ProblemState) -> bool:
+        # the first goal popped is a cheapest one
+        return True
 
-            if not state_hash_table[id][1]:
-                state_hash_table[id][1] = True
-                heapq.heappush(frontier, new_state)
+    def past_sweep(self, gval: float) -> bool:
+        return False
+
+    def finish(self, expanded_count: int, stored: int):
+        if self.budget.exceeded is not None:
+            return self.budget.result(expanded_count, stored)
+        return "Impossible", 0, expanded_count, stored
 
     @profile
     def search(self):
-        frontier: list[ProblemState] = []
-        heapq.heappush(frontier, self.initial_state)
+        self.begin()
+
+        frontier: BucketQueue[ProblemState] = BucketQueue()
+        frontier.push(self.initial_state.gval, self.initial_state)
 
         closed: set[ProblemState] = set()
         closed.add(self.initial_state)
@@ -68,22 +86,33 @@ class UCS(Search):
 
         expanded_count = 0
         while frontier:
-            current_state = heapq.heappop(frontier)
-            if current_state.is_final(self.switches_pos):
-                path, w = self.construct_path(current_state)
-                return path, w, expanded_count, len(closed)
+            gval, current_state = frontier.pop()
 
+            # skip entries filed under an outdated cost or already expanded
             current_hash = hash(current_state)
-            if state_hash_table[current_hash][0] != current_state:
+            state, in_frontier = state_hash_table[current_hash]
+            if state is not current_state or not in_frontier or gval != state.gval:
                 continue
 
+            if self.past_sweep(gval):
+                break
+
+            if current_state.is_final(self.switches_pos):
+                if self.stop_at(current_state):
+                    path, w = self.construct_path(current_state)
+                    return path, w, expanded_count, len(closed)
+
+                state_hash_table[current_hash][1] = False
+                continue
+
+            if self.budget.exhausted(expanded_count, len(closed)):
+                break
+
             expanded_count += 1
 
             state_hash_table[current_hash][1] = False
 
-            for dir in Direction:
-                if self.can_go(current_state, dir):
-                    new_state = self.go(current_state, dir)
-                    self.handle(new_state, closed, frontier, state_hash_table)
+            for new_state in self.successors(current_state):
+                self.handle(new_state, closed, frontier, state_hash_table)
 
-        return "Impossible", 0, expanded_count, len(closed)
+        return self.finish(expanded_count, len(closed))
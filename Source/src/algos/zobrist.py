@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+from collections.abc import Iterable
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .search import Point, StonesPos
+
+
+class ZobristTable:
+    """Per-level random keys for (cell, stone weight) and player cell.
+
+    A state hash is the XOR of the keys of its stones and player, so moving one
+    stone or the player only needs the old and new keys XOR-ed in."""
+
+    def __init__(
+        self,
+        num_row: int,
+        num_col: int,
+        weights: Iterable[int],
+        *,
+        use_weight: bool = False,
+        seed: int | None = None,
+    ):
+        rng = random.Random(seed)
+
+        self.num_col = num_col
+
+        # without weights every stone is alike, so they all share the same column
+        self.weight_index = (
+            {w: i for i, w in enumerate(sorted(set(weights)))} if use_weight else {}
+        )
+        num_weight = max(len(self.weight_index), 1)
+
+        num_cell = num_row * num_col
+        self.stone_keys = [
+            [rng.getrandbits(64) for _ in range(num_weight)] for _ in range(num_cell)
+        ]
+        self.player_keys = [rng.getrandbits(64) for _ in range(num_cell)]
+
+    def stone_key(self, x: int, y: int, w: int):
+        return self.stone_keys[x * self.num_col + y][self.weight_index.get(w, 0)]
+
+    def player_key(self, x: int, y: int):
+        return self.player_keys[x * self.num_col + y]
+
+    def hash_state(self, player_pos: Point, stones_pos: StonesPos):
+        h = self.player_key(*player_pos)
+        for x, y, w in stones_pos:
+            h ^= self.stone_key(x, y, w)
+        return h
+
+    def hash_move(
+        self,
+        zobrist_hash: int,
+        player_from: Point,
+        player_to: Point,
+        stone_from: Point | None = None,
+        stone_to: Point | None = None,
+        w: int = 0,
+    ):
+        num_col = self.num_col
+        player_keys = self.player_keys
+
+        zobrist_hash ^= (
+            player_keys[player_from[0] * num_col + player_from[1]]
+            ^ player_keys[player_to[0] * num_col + player_to[1]]
+        )
+
+        if stone_from is not None and stone_to is not None:
+            wi = self.weight_index.get(w, 0)
+            zobrist_hash ^= (
+                self.stone_keys[stone_from[0] * num_col + stone_from[1]][wi]
+                ^ self.stone_keys[stone_to[0] * num_col + stone_to[1]][wi]
+            )
+
+        return zobrist_hash
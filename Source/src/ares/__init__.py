@@ -1,17 +1,20 @@
 import os
 
+from algos.budget import SearchBudget
 from constants.enums import Algorithm
-from constants.paths import INPUT_DIR
+from core.batch import run_batch
 from core.game import Game
-from core.solver import SokobanSolver
 from utils import (
-    export_output_data,
+    console_log,
     get_project_toml_data,
     parse_args,
+    with_batch_arg,
+    with_budget_arg,
     with_gui_arg,
+    with_heuristic_arg,
     with_version_arg,
 )
-from utils.generate import generate_output_content
+from utils.log import LogType
 
 
 def dev():
@@ -19,52 +22,40 @@ def dev():
 
 
 def solve():
-    for inp_path, out_path in [
-        (
-            f"input-{'0' if i < 10 else ''}{i}.txt",
-            f"output-{'0' if i < 10 else ''}{i}.txt",
-        )
-        # for i in [1, 4, 6, 18, 19, 21, 22, 23, 24, 25, 26, 27, 28, 29, 30, 31, 32, 34]
-        # for i in [2, 3, 5, 7, 8, 11, 20, 35, 36]
-        # for i in [0, 9, 10, 12, 13, 14, 15, 16, 17, 33]
-        for i in range(1, 37)
-    ]:
-        output_data = ""
+    __toml = get_project_toml_data()
 
-        for algo, res in (
-            SokobanSolver()
-            .load_map(os.path.join(INPUT_DIR, inp_path))
-            .searching(
-                [
-                    # Algorithm.BFS,
-                    # Algorithm.DFS,
-                    # Algorithm.UCS,
-                    # Algorithm.DIJKSTRA,
-                    # Algorithm.GREEDY,
-                    Algorithm.ASTAR,
-                    # Algorithm.SWARM,
-                    # Algorithm.CONVERGENT_SWARM,
-                    # Algorithm.BIDIR_SWARM,
-                    # Algorithm.ANT_COLONY,
-                ]
-            )
-        ).items():
-            (path, weight, expanded_node, explored_node), time, mem, mem_peak = res
+    args = parse_args(
+        prog="solve",
+        desc=__toml["description"],
+        wrappers=[with_batch_arg, with_heuristic_arg, with_budget_arg],
+    )
+
+    options = {"heuristic": args.heuristic} if args.heuristic else {}
+    options.update(epsilon=args.epsilon, anytime=args.anytime)
 
-            output_data += (
-                generate_output_content(
-                    algo,
-                    len(path),
-                    weight,
-                    expanded_node,
-                    time,
-                    mem_peak,
-                    path,
-                )
-                + "\n"
-            )
+    # a search over budget gives its limit in place of the path, the run goes on
+    if any(
+        _ is not None
+        for _ in (args.timeout, args.max_nodes, args.max_states, args.max_memory)
+    ):
+        options["budget"] = SearchBudget(
+            max_seconds=args.timeout,
+            max_expanded=args.max_nodes,
+            max_states=args.max_states,
+            max_memory=args.max_memory << 20 if args.max_memory else None,
+        )
 
-        export_output_data(output_data, out_path)
+    for filename, algo, block, error in run_batch(
+        args.levels,
+        [Algorithm.from_label(_) for _ in args.algos],
+        jobs=args.jobs or os.cpu_count() or 1,
+        resume=args.resume,
+        **options,
+    ):
+        if block is None:
+            console_log(LogType.ERR, f"{filename} {algo}: {error}")
+        else:
+            console_log(LogType.OK, f"{filename} {algo}: {block.splitlines()[1]}")
 
 
 def main() -> int:
@@ -85,4 +76,4 @@ def main() -> int:
     if args.gui:
         Game().run()
 
-    return 0
\ No newline at end of file
+    return 0
@@ -64,6 +64,9 @@ class Algorithm(Enum):
     CONVERGENT_SWARM = 7, "Convergent Swarm", "Convergent Swarm Algorithm"
     BIDIR_SWARM = 8, "Bidirectional Swarm", "Bidirectional Swarm Algorithm"
     ANT_COLONY = 9, "Ant Colony", "Ant Colony Optimization"
+    IDASTAR = 10, "IDA*", "Iterative Deepening A* with a transposition table"
+    BIDIRECTIONAL = 11, "Bidirectional", "Bidirectional search with reverse pulls"
+    HDASTAR = 12, "HDA*", "Hash Distributed A* over worker processes"
 
     @staticmethod
     def from_label(label: str):
@@ -86,6 +89,61 @@ class Algorithm(Enum):
         return algo.value[2]
 
 
+class HeuristicType(Enum):
+    MANHATTAN = 0, "manhattan", "Weighted Manhattan distance to the closest goal"
+    HUNGARIAN = 1, "hungarian", "Stone to goal assignment over Manhattan distances"
+    PUSH = 2, "push", "Weighted push distance to the closest goal"
+    MATCHING = 3, "matching", "Stone to goal assignment over push distances"
+
+    @staticmethod
+    def from_label(label: str):
+        for heuristic in HeuristicType:
+            if heuristic.value[1] == label:
+                return heuristic
+
+        return HeuristicType.MATCHING
+
+    @staticmethod
+    def get_label(heuristic: HeuristicType):
+        return heuristic.value[1]
+
+    @staticmethod
+    def get_labels():
+        return [heuristic.value[1] for heuristic in HeuristicType]
+
+    @staticmethod
+    def get_desc(heuristic: HeuristicType):
+        return heuristic.value[2]
+
+
+class BudgetLimit(Enum):
+    TIME = 0, "Timeout", "Wall-clock time limit reached"
+    EXPANDED = 1, "Node limit", "Expanded node limit reached"
+    STATES = 2, "State limit", "Stored state limit reached"
+    MEMORY = 3, "Memory limit", "Memory limit reached"
+
+    @staticmethod
+    def from_label(label: str):
+        # None for a path or "Impossible": the search was not cut short
+        for limit in BudgetLimit:
+            if limit.value[1] == label:
+                return limit
+
+        return None
+
+    @staticmethod
+    def get_label(limit: BudgetLimit):
+        return limit.value[1]
+
+    @staticmethod
+    def get_labels():
+        return [limit.value[1] for limit in BudgetLimit]
+
+    @staticmethod
+    def get_desc(limit: BudgetLimit):
+        return limit.value[2]
+
+
 class Direction(Enum):
     # DIR = idx, label, movement, vec(row, col)
     UP = 0, "UP", "u", (-1, 0)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from constants.enums import Algorithm, BudgetLimit
+from constants.paths import INPUT_DIR, OUTPUT_DIR
+from core.solver import SokobanSolver
+from utils.base import split_into_chunks
+from utils.data import extract_data_from_file, get_input_filenames
+from utils.generate import generate_output_content
+
+# (input filename, algorithm label)
+type Task = tuple[str, str]
+# (input filename, algorithm label, output block, error message)
+type TaskResult = tuple[str, str, str | None, str | None]
+
+
+def select_levels(patterns: Iterable[str]) -> list[str]:
+    """Input filenames matching level numbers or filename globs, all of them when
+    no pattern is given."""
+
+    filenames = sorted(get_input_filenames())
+    globs = [f"input-{int(_):02}.txt" if _.isdigit() else _ for _ in patterns]
+    if not globs:
+        return filenames
+
+    return [f for f in filenames if any(fnmatch.fnmatch(f, _) for _ in globs)]
+
+
+def output_filename(input_filename: str):
+    return "output-" + input_filename.removeprefix("input-")
+
+
+def read_blocks(filename: str) -> dict[str, str]:
+    # algorithm label -> its 3 lines block in an output file
+    lines = [
+        line.rstrip("\n")
+        for line in extract_data_from_file(os.path.join(OUTPUT_DIR, filename))
+    ]
+    return {
+        chunk[0]: "\n".join(chunk)
+        for chunk in split_into_chunks(lines, 3)
+        if len(chunk) == 3
+    }
+
+
+def write_blocks(filename: str, blocks: dict[str, str]):
+    # blocks in the order of the algorithms, swapped in at once so that a run
+    # killed midway never leaves a truncated file behind
+    labels = Algorithm.get_labels()
+    data = "".join(
+        blocks[label] + "\n"
+        for label in sorted(
+            blocks, key=lambda _: labels.index(_) if _ in labels else len(labels)
+        )
+    )
+
+    path = os.path.join(OUTPUT_DIR, filename)
+    with open(path + ".tmp", "w") as file:
+        file.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def is_fresh(input_filename: str, filename: str):
+    path = os.path.join(OUTPUT_DIR, filename)
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(
+        os.path.join(INPUT_DIR, input_filename)
+    )
+
+
+def is_done(block: str):
+    # a search cut short by its budget is run again
+    return BudgetLimit.from_label(block.split("\n")[2]) is None
+
+
+def solve_task(filename: str, label: str, options: dict) -> TaskResult:
+    # a level that cannot be read is reported and the other tasks go on, any
+    # other error (out of memory included) stops the whole batch
+    try:
+        solver = SokobanSolver().load_map(os.path.join(INPUT_DIR, filename))
+    except (OSError, ValueError, IndexError) as e:
+        return filename, label, None, f"{type(e).__name__}: {e}"
+
+    ((path, weight, expanded, _), time, _, peak), *_ = solver.searching(
+        [Algorithm.from_label(label)], **options
+    ).values()
+
+    block = generate_output_content(
+        label, len(path), weight, expanded, time, peak, path
+    )
+    return filename, label, block, None
+
+
+def run_batch(
+    patterns: Iterable[str],
+    algos: list[Algorithm],
+    *,
+    jobs: int = 1,
+    resume: bool = False,
+    **options,
+):
+    """Solve every selected level with every algorithm, as separate tasks spread
+    over `jobs` processes, and yield each task's result as soon as it is done.
+
+    Its block is written to the level's output file right away, so a run that is
+    stopped keeps everything finished so far. With resume, the results already
+    in an output file newer than its input are kept and not solved again.
+    options are given to SokobanSolver.searching, a budget bounds each task."""
+
+    outputs: dict[str, dict[str, str]] = {}
+    tasks: list[Task] = []
+    for filename in select_levels(patterns):
+        out = output_filename(filename)
+        blocks = read_blocks(out) if resume and is_fresh(filename, out) else {}
+        outputs[out] = blocks
+
+        for algo in algos:
+            label = Algorithm.get_label(algo)
+            if label not in blocks or not is_done(blocks[label]):
+                tasks.append((filename, label))
+
+    def finished(results: Iterable[TaskResult]):
+        for result in results:
+            filename, label, block, _ = result
+            if block is not None:
+                out = output_filename(filename)
+                outputs[out][label] = block
+                write_blocks(out, outputs[out])
+            yield result
+
+    if jobs <= 1:
+        yield from finished(solve_task(*task, options) for task in tasks)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(solve_task, *task, options) for task in tasks]
+        try:
+            yield from finished(future.result() for future in as_completed(futures))
+        finally:
+            # a task that failed, or a caller that stopped reading, drops the
+            # tasks not started yet instead of waiting for all of them
+            pool.shutdown(cancel_futures=True)
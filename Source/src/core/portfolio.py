@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import queue
+import signal
+import sys
+from typing import TYPE_CHECKING, Any
+
+from constants.enums import BudgetLimit
+
+if TYPE_CHECKING:
+    from algos.search import Search
+
+# ((path, weight, expanded, explored), time, mem, peak) of a profiled search
+type SearchResult = tuple[tuple[Any, int, int, int], float, int, int]
+
+
+def is_solution(result: SearchResult):
+    path = result[0][0]
+    return path != "Impossible" and BudgetLimit.from_label(path) is None
+
+
+def search_worker(
+    key: str,
+    algo: type[Search],
+    args: tuple,
+    options: dict,
+    results: mp.Queue,
+):
+    # exit on terminate() through the finally blocks of the search, so that a
+    # search with processes of its own (HDA*) stops them too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(1))
+
+    try:
+        results.put((key, algo(*args, **options).search()))
+    except Exception as e:
+        # run_portfolio raises it again, the worker still fails with it
+        results.put((key, e))
+        raise
+    finally:
+        # only the result is left to flush, a terminate() can end it right away
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def run_portfolio(
+    args: tuple,
+    searches: dict[str, tuple[type[Search], dict]],
+    *,
+    first_wins: bool = False,
+) -> dict[str, SearchResult]:
+    """Run every search in a process of its own and collect their results.
+
+    With first_wins, the first path found stops the workers still running and
+    only the results received up to then are returned. Each worker compiles its
+    own LevelContext, as a context cannot be shared across processes. A worker
+    that dies without a result (killed, out of memory) is left out. Workers are
+    not daemonic so that they can start processes of their own, they are all
+    terminated and joined before returning."""
+
+    ctx = mp.get_context()
+    results = ctx.Queue()
+
+    workers = {
+        key: ctx.Process(
+            target=search_worker,
+            args=(key, algo, args, options, results),
+        )
+        for key, (algo, options) in searches.items()
+    }
+    for worker in workers.values():
+        worker.start()
+
+    done: dict[str, SearchResult] = {}
+    lost: set[str] = set()
+    exited: set[str] = set()
+    try:
+        while len(done) + len(lost) < len(workers):
+            try:
+                key, result = results.get(timeout=0.1)
+            except queue.Empty:
+                # a result is flushed before its worker exits, so one that was
+                # already gone at the last timeout has none left in flight
+                dead = {
+                    key
+                    for key, worker in workers.items()
+                    if key not in done and worker.exitcode is not None
+                }
+                lost |= dead & exited
+                exited = dead
+                continue
+
+            if isinstance(result, Exception):
+                raise result
+
+            done[key] = result
+            if first_wins and is_solution(result):
+                break
+    finally:
+        for worker in workers.values():
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+    return {key: done[key] for key in searches if key in done}
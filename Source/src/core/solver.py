@@ -2,10 +2,23 @@ from __future__ import annotations
 
 import re
 
-from algos import BFS, DFS, GBFS, UCS, AStar, Dijkstra, Swarm
+from algos import (
+    BFS,
+    DFS,
+    GBFS,
+    UCS,
+    AStar,
+    Bidirectional,
+    Dijkstra,
+    HDAStar,
+    IDAStar,
+    Swarm,
+)
+from algos.budget import SearchBudget
 from algos.search import Search, StonesPosFreeze
 from algos.swarm import AntColonyOptimization, SwarmBidirectional, SwarmConvergent
 from constants.enums import Algorithm, GridItem
+from core.portfolio import run_portfolio
 
 
 class SokobanSolver:
@@ -83,7 +96,26 @@ class SokobanSolver:
 
         return self
 
-    def searching(self, algos: list[Algorithm] = []):
+    def searching(
+        self,
+        algos: list[Algorithm] = [],
+        *,
+        parallel: bool = False,
+        first_wins: bool = False,
+        budgets: dict[Algorithm, SearchBudget] | None = None,
+        epsilon: float = 1.0,
+        anytime: bool = False,
+        **options,
+    ):
+        """Run the selected algorithms on the level, all but HDA* when empty.
+
+        Every algorithm compiles the level on its own so that the caches of one do
+        not speed up the next, unless options["context"] is given. budgets
+        overrides options["budget"] per algorithm, epsilon and anytime are only
+        given to A*. With parallel, every algorithm runs in a worker process of
+        its own, and with first_wins as well the first path found stops the
+        others, whose results are left out."""
+
         args = (
             self.num_row,
             self.num_col,
@@ -95,24 +127,43 @@ class SokobanSolver:
             # use_optimized=False,
         )
 
-        __algos_searching: dict[str, Search] = {
-            Algorithm.get_label(Algorithm.BFS): BFS(*args),
-            Algorithm.get_label(Algorithm.DFS): DFS(*args),
-            Algorithm.get_label(Algorithm.UCS): UCS(*args),
-            Algorithm.get_label(Algorithm.ASTAR): AStar(*args),
-            Algorithm.get_label(Algorithm.GREEDY): GBFS(*args),
-            Algorithm.get_label(Algorithm.DIJKSTRA): Dijkstra(*args),
-            Algorithm.get_label(Algorithm.SWARM): Swarm(*args),
-            Algorithm.get_label(Algorithm.CONVERGENT_SWARM): SwarmConvergent(*args),
-            Algorithm.get_label(Algorithm.BIDIR_SWARM): SwarmBidirectional(*args),
-            Algorithm.get_label(Algorithm.ANT_COLONY): AntColonyOptimization(*args),
+        __algos_searching: dict[str, type[Search]] = {
+            Algorithm.get_label(Algorithm.BFS): BFS,
+            Algorithm.get_label(Algorithm.DFS): DFS,
+            Algorithm.get_label(Algorithm.UCS): UCS,
+            Algorithm.get_label(Algorithm.ASTAR): AStar,
+            Algorithm.get_label(Algorithm.GREEDY): GBFS,
+            Algorithm.get_label(Algorithm.DIJKSTRA): Dijkstra,
+            Algorithm.get_label(Algorithm.SWARM): Swarm,
+            Algorithm.get_label(Algorithm.CONVERGENT_SWARM): SwarmConvergent,
+            Algorithm.get_label(Algorithm.BIDIR_SWARM): SwarmBidirectional,
+            Algorithm.get_label(Algorithm.ANT_COLONY): AntColonyOptimization,
+            Algorithm.get_label(Algorithm.IDASTAR): IDAStar,
+            Algorithm.get_label(Algorithm.BIDIRECTIONAL): Bidirectional,
+            Algorithm.get_label(Algorithm.HDASTAR): HDAStar,
         }
 
-        if len(algos) == 0:
-            return {key: algo.search() for key, algo in __algos_searching.items()}
+        def options_of(algo: Algorithm):
+            algo_options = dict(options)
+            if budgets and algo in budgets:
+                algo_options["budget"] = budgets[algo]
+            if algo == Algorithm.ASTAR:
+                algo_options.update(epsilon=epsilon, anytime=anytime)
+            return algo_options
 
-        return {
-            key: algo.search()
+        searches = {
+            key: (algo, options_of(Algorithm.from_label(key)))
             for key, algo in __algos_searching.items()
+            # HDA* takes a process per core, it only runs when asked for
             if Algorithm.from_label(key) in algos
+            or (len(algos) == 0 and algo is not HDAStar)
+        }
+
+        if parallel:
+            return run_portfolio(args, searches, first_wins=first_wins)
+
+        # algorithms are only built when selected, one after another
+        return {
+            key: algo(*args, **algo_options).search()
+            for key, (algo, algo_options) in searches.items()
         }
@@ -1,4 +1,11 @@
-from .args import parse_args, with_gui_arg, with_version_arg
+from .args import (
+    parse_args,
+    with_batch_arg,
+    with_budget_arg,
+    with_gui_arg,
+    with_heuristic_arg,
+    with_version_arg,
+)
 
 # from .asset_loader import (
 #     get_asset_path,
@@ -38,7 +45,10 @@ from .metrics import profile
 
 __all__ = [
     "parse_args",
+    "with_batch_arg",
+    "with_budget_arg",
     "with_gui_arg",
+    "with_heuristic_arg",
     "with_version_arg",
     #
     # "get_asset_path",
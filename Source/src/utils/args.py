@@ -1,5 +1,7 @@
 from argparse import ArgumentParser
 
+from constants.enums import Algorithm, HeuristicType
+
 
 def with_version_arg(parser: ArgumentParser):
     parser.add_argument("-v", "--version", help="Version", action="store_true")
@@ -9,6 +11,68 @@ def with_gui_arg(parser: ArgumentParser):
     parser.add_argument("--gui", help="gui", action="store_true")
 
 
+def with_heuristic_arg(parser: ArgumentParser):
+    parser.add_argument(
+        "--heuristic",
+        help="heuristic of the informed searches",
+        choices=HeuristicType.get_labels(),
+        default=None,
+    )
+    parser.add_argument(
+        "--epsilon",
+        help="weight of the A* heuristic, paths cost at most epsilon times the optimum",
+        type=float,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--anytime",
+        help="keep improving the A* path until it is optimal or the budget is spent",
+        action="store_true",
+    )
+
+
+def with_batch_arg(parser: ArgumentParser):
+    parser.add_argument(
+        "levels",
+        help="level numbers or input filename globs, all levels when omitted",
+        nargs="*",
+    )
+    parser.add_argument(
+        "--algos",
+        help="algorithms to run on every level",
+        nargs="+",
+        choices=Algorithm.get_labels(),
+        default=[Algorithm.get_label(Algorithm.ASTAR)],
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="tasks run at once, 0 for one per core",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--resume",
+        help="keep the results of output files newer than their input",
+        action="store_true",
+    )
+
+
+def with_budget_arg(parser: ArgumentParser):
+    parser.add_argument(
+        "--timeout", help="seconds each search may run", type=float, default=None
+    )
+    parser.add_argument(
+        "--max-nodes", help="states each search may expand", type=int, default=None
+    )
+    parser.add_argument(
+        "--max-states", help="states each search may store", type=int, default=None
+    )
+    parser.add_argument(
+        "--max-memory", help="megabytes each search may trace", type=int, default=None
+    )
+
+
 def parse_args(*, prog: str, desc: str, wrappers: list):
     parser = ArgumentParser(
         prog=prog,
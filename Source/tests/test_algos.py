@@ -0,0 +1,827 @@
+import multiprocessing
+import os
+import random
+import time
+
+import pytest
+
+from algos import (
+    BFS,
+    DFS,
+    GBFS,
+    UCS,
+    AStar,
+    Bidirectional,
+    Dijkstra,
+    HDAStar,
+    IDAStar,
+    SwarmBidirectional,
+)
+from algos.bitboard import BoardIndex, iter_bits
+from algos.budget import SearchBudget
+from algos.cache import HeuristicCache, StateSet, TranspositionTable
+from algos.external import record_struct
+from algos.context import LevelContext
+from algos.heuristics import MatchingHeuristic, make_heuristic
+from algos.push import goal_regions, pulls
+from algos.queues import BucketOpenList, BucketQueue
+from algos.search import Point, stones_index
+from constants.enums import Algorithm, BudgetLimit, Direction, HeuristicType
+from constants.paths import INPUT_DIR
+from core.batch import (
+    is_done,
+    is_fresh,
+    output_filename,
+    read_blocks,
+    run_batch,
+    select_levels,
+    write_blocks,
+)
+from core.portfolio import is_solution
+from core.solver import SokobanSolver
+from utils.data import get_input_filenames
+
+
+def load_solver(index: int):
+    return SokobanSolver().load_map(os.path.join(INPUT_DIR, f"input-{index:02}.txt"))
+
+
+def search_args(solver: SokobanSolver):
+    return (
+        solver.num_row,
+        solver.num_col,
+        solver.search_matrix,
+        solver.player_pos,
+        solver.stones_pos,
+        solver.switches_pos,
+    )
+
+
+def replay(solver: SokobanSolver, path: str):
+    # play the moves on the map, return the final stone cells and the pushed weight
+    x, y = solver.player_pos
+    stones = {(sx, sy): w for sx, sy, w in solver.stones_pos}
+    weight = 0
+
+    for move in path:
+        dx, dy = Direction.get_vec(Direction.from_char(move.lower()))
+        x, y = x + dx, y + dy
+        assert solver.search_matrix[x][y] != "#"
+
+        assert ((x, y) in stones) == move.isupper()
+        if move.isupper():
+            assert solver.search_matrix[x + dx][y + dy] != "#"
+            assert (x + dx, y + dy) not in stones
+
+            stones[(x + dx, y + dy)] = stones.pop((x, y))
+            weight += stones[(x + dx, y + dy)]
+
+    return frozenset(stones), weight
+
+
+def test_iter_bits():
+    assert list(iter_bits(0)) == []
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+
+
+def test_bitboard_encoding():
+    solver = load_solver(2)
+    board = BoardIndex(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+
+    mask, weights = board.encode_stones(solver.stones_pos)
+    assert mask.bit_count() == len(solver.stones_pos)
+    assert board.decode_stones(mask, weights) == solver.stones_pos
+
+    src = next(iter_bits(mask))
+    dst = next(i for i in range(board.size) if not (mask >> i) & 1)
+    new_mask, new_weights, w = board.move_stone(mask, weights, src, dst)
+    assert new_mask == mask ^ (1 << src) ^ (1 << dst)
+    assert (*board.cells[dst], w) in board.decode_stones(new_mask, new_weights)
+
+
+def test_bitboard_search():
+    solver = load_solver(2)
+
+    (path, weight, _, _), *_ = BFS(*search_args(solver)).search()
+    (bb_path, bb_weight, _, _), *_ = BFS(
+        *search_args(solver), use_bitboard=True
+    ).search()
+    assert (len(bb_path), bb_weight) == (len(path), weight) == (10, 6)
+
+    (path, weight, _, _), *_ = AStar(*search_args(solver), use_bitboard=True).search()
+    assert (len(path), weight) == (10, 6)
+
+
+def test_searching_options():
+    res = load_solver(2).searching([Algorithm.BFS], use_bitboard=True)
+    (path, *_), *_ = res[Algorithm.get_label(Algorithm.BFS)]
+    assert len(path) == 10
+
+    # HDA* takes every core, it is left out unless asked for
+    res = load_solver(2).searching(budget=SearchBudget(max_expanded=20))
+    assert set(res) == set(Algorithm.get_labels()) - {
+        Algorithm.get_label(Algorithm.HDASTAR)
+    }
+
+
+def test_zobrist_incremental_hash():
+    solver = load_solver(3)
+
+    for use_bitboard in (False, True):
+        algo = UCS(*search_args(solver), use_bitboard=use_bitboard)
+
+        state = algo.initial_state
+        for dir in [Direction.DOWN, Direction.RIGHT, Direction.DOWN, Direction.RIGHT]:
+            assert algo.can_go(state, dir)
+            state = algo.go(state, dir)
+            assert state.zobrist_hash == algo.zobrist.hash_state(
+                state.player_pos, state.stones_pos
+            )
+
+
+def test_stones_lookup():
+    solver = load_solver(2)
+    index = stones_index(solver.stones_pos)
+
+    assert len(index) == len(solver.stones_pos)
+    for stone in solver.stones_pos:
+        assert index[stone[:2]] == stone
+
+
+def test_level_context():
+    solver = load_solver(3)
+    context = LevelContext(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+
+    # player at (1, 2): wall above, floor below, stone below that
+    cell = context.cell(solver.player_pos)
+    up, down = Direction.UP.value[0], Direction.DOWN.value[0]
+    assert context.neighbors[cell][up] == -1
+    assert context.points[context.neighbors[cell][down]] == (2, 2)
+    assert context.points[context.push_targets[cell][down]] == (3, 2)
+
+    assert all(context.goals[context.cell(g)] for g in solver.switches_pos)
+    assert context.dead[context.cell((3, 1))] and not context.dead[context.cell((2, 5))]
+
+    algos = [algo(*search_args(solver), context=context) for algo in (BFS, UCS)]
+    assert all(algo.context is context for algo in algos)
+    for algo in algos:
+        (path, weight, _, _), *_ = algo.search()
+        assert (len(path), weight) == (30, 14)
+
+
+def test_push_level_search():
+    for index in (2, 3, 5):
+        solver = load_solver(index)
+
+        for algo in (BFS, UCS, AStar):
+            for use_bitboard in (False, True):
+                (path, weight, _, _), *_ = algo(
+                    *search_args(solver),
+                    use_push_level=True,
+                    use_bitboard=use_bitboard,
+                ).search()
+
+                assert replay(solver, path) == (solver.switches_pos, weight)
+
+    # searches that cannot expand pushes ignore the option and still solve
+    for index in (1, 2):
+        solver = load_solver(index)
+        (path, weight, _, _), *_ = SwarmBidirectional(
+            *search_args(solver), use_push_level=True
+        ).search()
+        assert replay(solver, path) == (solver.switches_pos, weight)
+
+
+def test_freeze_table():
+    room = [list(row) for row in ["#######", *["#     #"] * 5, "#######"]]
+    block = [(2, 2), (2, 3), (3, 2), (3, 3)]
+
+    def is_frozen(goals: list[Point], stones: list[Point]):
+        context = LevelContext(7, 7, room, frozenset(goals))
+        mask = sum(1 << context.cell(p) for p in stones)
+        return context.freeze.is_frozen(context.cell(stones[0]), mask)
+
+    # a 2x2 block never moves again, which is only fine with all of it on goals
+    assert is_frozen([(3, 3)], block)
+    assert not is_frozen(block, block)
+    assert not is_frozen([(3, 3)], [(3, 3)])
+    assert not is_frozen([(3, 3)], block[:3])
+
+    solver = load_solver(13)
+    context = LevelContext(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+    floor = [
+        context.cell((x, y))
+        for x in range(1, solver.num_row - 1)
+        for y in range(1, solver.num_col - 1)
+        if not context.walls[context.cell((x, y))]
+    ]
+
+    rng = random.Random(0)
+    frozen = 0
+    for _ in range(300):
+        stones = rng.sample(floor, 8)
+        mask = sum(1 << cell for cell in stones)
+
+        # the second call is answered by the cache when the check stayed local
+        expected = context.freeze.is_frozen(stones[0], mask)
+        assert context.freeze.is_frozen(stones[0], mask) == expected
+        frozen += expected
+
+    assert context.freeze.hits > 0 and 0 < frozen < 300
+
+
+def test_corral_search():
+    for index in (3, 5, 16):
+        solver = load_solver(index)
+        context = LevelContext(
+            solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+        )
+
+        results = [
+            BFS(
+                *search_args(solver),
+                use_push_level=True,
+                use_corral=use_corral,
+                context=context,
+            ).search()[0]
+            for use_corral in (False, True)
+        ]
+
+        # corral pruning only drops deadlocked states: same pushes, fewer nodes
+        (
+            (path, _, expanded, _),
+            (corral_path, corral_weight, corral_expanded, _),
+        ) = results
+        assert replay(solver, corral_path) == (solver.switches_pos, corral_weight)
+        assert sum(map(str.isupper, corral_path)) == sum(map(str.isupper, path))
+        assert corral_expanded <= expanded
+
+    assert context.corral.misses > 0
+
+
+def test_matching_table():
+    solver = load_solver(8)
+    context = LevelContext(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+    matching = context.matching
+
+    # a stone on a simple deadlock square can reach no goal
+    for cell, dead in enumerate(context.dead):
+        if dead and not context.walls[cell]:
+            assert matching.reach[cell] == 0
+
+    stones = sum(1 << context.cell(s[:2]) for s in solver.stones_pos)
+    owner = matching.match(stones)
+    assert owner is not None and sorted(owner) == sorted(iter_bits(stones))
+
+    results = [
+        UCS(*search_args(solver), use_matching=use_matching, context=context).search()[
+            0
+        ]
+        for use_matching in (False, True)
+    ]
+    assert results[0][1] == results[1][1]
+    assert results[1][2] <= results[0][2]
+
+    # expanded states start from the matching repaired by the push to them
+    assert matching.solved < matching.repaired
+    for stones, owner in matching.matchings.items():
+        assert sorted(owner) == sorted(iter_bits(stones))
+        assert all((matching.reach[cell] >> g) & 1 for g, cell in enumerate(owner))
+
+
+def test_push_distances():
+    solver = load_solver(16)
+    context = LevelContext(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+
+    for goal, g in context.goal_index.items():
+        dist = context.push_distances[g]
+        assert dist[context.cell(goal)] == 0
+
+        # never below Manhattan distance, so the heuristics stay admissible
+        for cell, pushes in enumerate(dist):
+            x, y = context.points[cell]
+            assert pushes >= abs(x - goal[0]) + abs(y - goal[1])
+
+            if pushes < len(context.points):
+                assert (context.matching.reach[cell] >> g) & 1
+
+
+def test_cost_matrix():
+    solver = load_solver(16)
+    astar = AStar(*search_args(solver))
+    context = astar.context
+    stones = sorted(solver.stones_pos)
+
+    table = astar.evaluator.cost_matrix(stones)
+    manhattan = astar.evaluator.cost_matrix(stones, use_table=False)
+    for i, (x, y, w) in enumerate(stones):
+        for g, (gx, gy) in enumerate(context.goal_array.tolist()):
+            assert table[i, g] == w * context.push_distances[g][context.cell((x, y))]
+            assert manhattan[i, g] == w * (abs(x - gx) + abs(y - gy))
+
+    children = list(astar.successors(astar.initial_state))
+    scores = astar.heuristic_batch([child.stones_pos for child in children])
+    assert scores == [
+        astar.heuristic(child.stones_pos, solver.switches_pos) for child in children
+    ]
+
+
+def test_incremental_hungarian():
+    solver = load_solver(13)
+    astar = AStar(*search_args(solver), use_incremental=True)
+
+    rng = random.Random(0)
+    state = astar.initial_state
+    for _ in range(200):
+        children = list(astar.successors(state))
+        if not children:
+            state = astar.initial_state
+            continue
+
+        scores = astar.heuristic_batch(
+            [child.stones_pos for child in children], parent=state.stones_pos
+        )
+        assert scores == [
+            astar.evaluator.assignment_cost(
+                astar.evaluator.cost_matrix(child.stones_pos)
+            )
+            for child in children
+        ]
+        state = rng.choice(children)
+
+    assert astar.evaluator.assignment.repaired > 0
+
+
+def test_heuristic_cache():
+    cache = HeuristicCache(capacity=2)
+    cache.put("a", 1.0)
+    cache.put("b", 2.0)
+    assert cache.get("a") == 1.0
+
+    # "b" is the least recently used entry
+    cache.put("c", 3.0)
+    assert cache.get("b") is None
+    assert (len(cache), cache.hits, cache.misses) == (2, 1, 1)
+
+    solver = load_solver(5)
+    context = LevelContext(
+        solver.num_row, solver.num_col, solver.search_matrix, solver.switches_pos
+    )
+    (path, weight, _, _), *_ = AStar(*search_args(solver), context=context).search()
+    assert context.heuristic_cache.hits > 0
+
+    # a second search of the level starts with a warm cache
+    misses = context.heuristic_cache.misses
+    (same_path, same_weight, _, _), *_ = AStar(
+        *search_args(solver), context=context
+    ).search()
+    assert (same_path, same_weight) == (path, weight)
+    assert context.heuristic_cache.misses == misses
+
+
+def test_heuristics():
+    solver = load_solver(16)
+    astar = AStar(*search_args(solver))
+    children = [_.stones_pos for _ in astar.successors(astar.initial_state)]
+    stones_list = [astar.initial_state.stones_pos, *children]
+
+    scores = {}
+    for label in HeuristicType.get_labels():
+        heuristic = make_heuristic(label).prepare(astar)
+        scores[label] = heuristic.evaluate_batch(stones_list)
+        assert scores[label] == [heuristic.compute(_) for _ in stones_list]
+
+    # push distances bound Manhattan distances, assignments bound closest goals
+    for i in range(len(stones_list)):
+        assert scores["manhattan"][i] <= scores["hungarian"][i] <= scores["matching"][i]
+        assert scores["manhattan"][i] <= scores["push"][i] <= scores["matching"][i]
+
+    assert isinstance(astar.evaluator, MatchingHeuristic)
+    assert AStar(*search_args(solver), heuristic="push").evaluator.name == "push"
+
+
+def test_bucket_queue():
+    queue: BucketQueue[str] = BucketQueue()
+    for key, item in [(3, "c"), (1, "a"), (7, "d"), (1, "b")]:
+        queue.push(key, item)
+
+    assert len(queue) == 4
+    assert [queue.pop()[0] for _ in range(3)] == [1, 1, 3]
+
+    # keys below the cursor are still served first
+    queue.push(2, "e")
+    assert queue.pop() == (2, "e")
+    assert queue.pop() == (7, "d")
+    assert not queue
+
+
+def test_bucket_open_list():
+    frontier: BucketOpenList[str] = BucketOpenList()
+    for f, g, item in [(5, 1, "a"), (4, 0, "b"), (4, 3, "c"), (5, 4, "d"), (4, 3, "e")]:
+        frontier.push(f, g, item)
+    assert frontier.peek() == (4, 3, "c")
+
+    # lowest f first, deepest g among equal f, first in first out on full ties
+    assert [frontier.pop() for _ in range(len(frontier))] == [
+        (4, 3, "c"),
+        (4, 3, "e"),
+        (4, 0, "b"),
+        (5, 4, "d"),
+        (5, 1, "a"),
+    ]
+    assert not frontier
+
+
+def test_state_set():
+    # keys sharing their high half all start probing from the same slot
+    keys = [random.getrandbits(128) for _ in range(500)]
+    keys += [1 << 64 | k for k in range(0, 1000, 2)]
+
+    states: StateSet[int] = StateSet(lambda key: key, capacity=4)
+    for key in keys:
+        states.add(key)
+    states.add(keys[0])
+
+    assert len(states) == len(set(keys))
+    assert all(key in states for key in keys)
+    assert (1 << 64 | 1001) not in states
+    assert states.nbytes <= 16 * 4 * len(states)
+
+    for index in (3, 5):
+        solver = load_solver(index)
+        for algo in (BFS, DFS, GBFS):
+            result, *_ = algo(*search_args(solver)).search()
+            compact, *_ = algo(*search_args(solver), use_compact=True).search()
+            assert compact == result
+
+        # the second half of a key is carried along the moves like the first one
+        for options in ({}, {"use_bitboard": True}, {"use_push_level": True}):
+            search = BFS(*search_args(solver), use_compact=True, **options)
+            for state in search.successors(search.initial_state):
+                for child in search.successors(state):
+                    assert child.check_hash is not None
+                    key = search.key_of(child)
+                    child.zobrist_hash = child.check_hash = None
+                    assert search.key_of(child) == key
+
+
+def test_uniform_cost_weights():
+    for index in (3, 5):
+        solver = load_solver(index)
+        (path, weight, _, _), *_ = UCS(*search_args(solver)).search()
+        (astar_path, astar_weight, _, _), *_ = AStar(*search_args(solver)).search()
+
+        # both minimize walks plus pushed weight
+        cost = len(path) - sum(map(str.isupper, path)) + weight
+        astar_cost = len(astar_path) - sum(map(str.isupper, astar_path)) + astar_weight
+        assert replay(solver, path) == (solver.switches_pos, weight)
+        assert cost == astar_cost
+
+
+def test_dijkstra_termination():
+    solver = load_solver(3)
+    (path, weight, expanded, _), *_ = Dijkstra(*search_args(solver)).search()
+    (ucs_path, ucs_weight, _, _), *_ = UCS(*search_args(solver)).search()
+    assert (len(path), weight) == (len(ucs_path), ucs_weight)
+
+    # sweeping every goal up to a cost returns the same cheapest one
+    cost = len(path) - sum(map(str.isupper, path)) + weight
+    sweep = Dijkstra(*search_args(solver), max_cost=cost + 4)
+    (sweep_path, sweep_weight, sweep_expanded, _), *_ = sweep.search()
+    assert (len(sweep_path), sweep_weight) == (len(path), weight)
+    assert sweep_expanded > expanded
+
+    costs = [state.gval for state in sweep.final_states]
+    assert costs == sorted(costs) and costs[0] == cost and costs[-1] <= cost + 4
+
+    # goals are collected, not expanded: none is reached by moving on from another
+    assert len(costs) > 1
+    assert not any(
+        state.ancestor.is_final(solver.switches_pos) for state in sweep.final_states
+    )
+
+    # a second sweep starts over instead of adding to the goals of the first
+    sweep.search()
+    assert [state.gval for state in sweep.final_states] == costs
+
+    (impossible, *_), *_ = Dijkstra(*search_args(solver), max_cost=cost - 1).search()
+    assert impossible == "Impossible"
+
+
+def test_transposition_table():
+    table = TranspositionTable(capacity=4)
+    assert table.probe(1, 5, 0)
+    # reached again as cheaply in the same pass, or more cheaply in any pass
+    assert not table.probe(1, 5, 0)
+    assert not table.probe(1, 6, 1)
+    assert table.probe(1, 5, 1) and table.probe(1, 3, 1)
+
+    # 5 shares the slot of 1: a resident closer to the root wins in its own pass
+    assert table.probe(5, 4, 1) and not table.probe(1, 3, 1)
+    assert table.probe(5, 2, 1) and not table.probe(5, 2, 1)
+    # older passes always give way
+    assert table.probe(1, 3, 2)
+    assert len(table) == 1 and table.replaced == 2
+
+
+def test_idastar():
+    for index in (3, 5):
+        solver = load_solver(index)
+        (path, weight, _, _), *_ = AStar(*search_args(solver)).search()
+        cost = len(path) - sum(map(str.isupper, path)) + weight
+
+        # a table much smaller than the state space only costs re-expansions
+        for table_size in (1 << 20, 64):
+            idastar = IDAStar(*search_args(solver), table_size=table_size)
+            (ida_path, ida_weight, _, explored), *_ = idastar.search()
+
+            assert replay(solver, ida_path) == (solver.switches_pos, ida_weight)
+            assert len(ida_path) - sum(map(str.isupper, ida_path)) + ida_weight == cost
+            assert explored <= table_size
+
+
+def test_hdastar():
+    for index in (3, 5):
+        solver = load_solver(index)
+        (path, weight, _, _), *_ = AStar(*search_args(solver)).search()
+        cost = len(path) - sum(map(str.isupper, path)) + weight
+
+        # rounds far smaller than the search keep states in flight between owners
+        for num_workers in (1, 3):
+            hdastar = HDAStar(
+                *search_args(solver), num_workers=num_workers, batch_size=16
+            )
+            (hda_path, hda_weight, _, _), *_ = hdastar.search()
+
+            assert replay(solver, hda_path) == (solver.switches_pos, hda_weight)
+            assert len(hda_path) - sum(map(str.isupper, hda_path)) + hda_weight == cost
+
+        # weighted, it stops on the same priority its open lists are keyed by
+        hdastar = HDAStar(*search_args(solver), num_workers=3, epsilon=2.0)
+        (hda_path, hda_weight, _, _), *_ = hdastar.search()
+        assert replay(solver, hda_path) == (solver.switches_pos, hda_weight)
+        hda_cost = len(hda_path) - sum(map(str.isupper, hda_path)) + hda_weight
+        assert cost <= hda_cost <= 2 * cost
+
+    class Killed(HDAStar):
+        def work(self, rank, *args):
+            if rank == 1:
+                os._exit(9)
+            super().work(rank, *args)
+
+    # a worker gone without a word fails the search instead of hanging it
+    killed = Killed(*search_args(load_solver(5)), num_workers=2)
+    killed.poll_timeout = 0.1
+    with pytest.raises(RuntimeError, match="exited with code 9"):
+        killed.search()
+
+    class Stuck(HDAStar):
+        def work(self, rank, *args):
+            pids.put(os.getpid())
+            time.sleep(60)
+
+    # a search terminated from outside stops and joins its workers on the way out
+    pids = multiprocessing.Queue()
+    stuck = Stuck(*search_args(load_solver(5)), num_workers=2)
+    search = multiprocessing.Process(target=stuck.search)
+    search.start()
+    workers = [pids.get(timeout=10) for _ in range(2)]
+    search.terminate()
+    search.join()
+    for pid in workers:
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+
+
+def test_external_bfs(tmp_path):
+    for index in (3, 5):
+        solver = load_solver(index)
+
+        for options in ({}, {"use_push_level": True}):
+            (path, *_), *_ = BFS(*search_args(solver), **options).search()
+
+            # runs much smaller than a layer make every layer a merge of several
+            bfs = BFS(
+                *search_args(solver),
+                external=True,
+                work_dir=str(tmp_path),
+                run_size=64,
+                **options,
+            )
+            (ext_path, ext_weight, _, _), *_ = bfs.search()
+
+            assert replay(solver, ext_path) == (solver.switches_pos, ext_weight)
+            if options:
+                assert sum(map(str.isupper, ext_path)) == sum(map(str.isupper, path))
+            else:
+                assert len(ext_path) == len(path)
+
+    assert not os.listdir(tmp_path)
+
+    # cells take four bytes on grids too large for two
+    assert record_struct(3, 1 << 16).size == 6
+    wide = record_struct(3, (1 << 16) + 1)
+    assert wide.unpack(wide.pack(0, 1 << 16, 1 << 20)) == (0, 1 << 16, 1 << 20)
+
+
+def test_anytime_astar():
+    def cost_of(path: str, weight: int):
+        return len(path) - sum(map(str.isupper, path)) + weight
+
+    for index in (3, 5):
+        solver = load_solver(index)
+        (path, weight, expanded, _), *_ = AStar(*search_args(solver)).search()
+        cost = cost_of(path, weight)
+
+        (path, weight, weighted_expanded, _), *_ = AStar(
+            *search_args(solver), epsilon=2.0
+        ).search()
+        assert cost <= cost_of(path, weight) <= 2 * cost
+        assert weighted_expanded < expanded
+
+        solutions = []
+        (path, weight, _, _), *_ = AStar(
+            *search_args(solver),
+            epsilon=3.0,
+            anytime=True,
+            on_solution=lambda *solution, out=solutions: out.append(solution),
+        ).search()
+
+        # every published path is better than the last and within its bound
+        costs = [cost_of(path, weight) for path, weight, _ in solutions]
+        assert costs == sorted(set(costs), reverse=True) and costs[-1] == cost
+        assert all(c <= bound * cost for c, (*_, bound) in zip(costs, solutions))
+        assert replay(solver, path) == (solver.switches_pos, weight)
+
+        # cut short by a budget, the last published path is kept over the limit
+        solutions.clear()
+        (path, weight, _, _), *_ = AStar(
+            *search_args(solver),
+            epsilon=3.0,
+            anytime=True,
+            on_solution=lambda *solution, out=solutions: out.append(solution),
+            budget=SearchBudget(max_expanded=expanded // 2),
+        ).search()
+        assert solutions and (path, weight) == solutions[-1][:2]
+
+    # epsilon and anytime only reach A*, the other algorithms take no such option
+    results = load_solver(3).searching(
+        [Algorithm.UCS, Algorithm.ASTAR], epsilon=2.0, anytime=True
+    )
+    assert all(path != "Impossible" for (path, *_), *_ in results.values())
+
+
+def test_bidirectional_search():
+    solver = load_solver(8)
+    bidirectional = Bidirectional(*search_args(solver))
+    ctx = bidirectional.context
+
+    # the last push leaves the player next to a stone, in one of these regions
+    goals = set(ctx.goal_cells)
+    regions = goal_regions(ctx, goals)
+    assert regions and len(set(regions)) == len(regions)
+    for stone, source, d, player in pulls(ctx, goals, regions[0]):
+        assert ctx.neighbors[source][d] == stone and source not in goals
+        assert player not in (goals - {stone}) | {source}
+
+    for index in (3, 8):
+        solver = load_solver(index)
+        (path, weight, _, explored), *_ = Bidirectional(*search_args(solver)).search()
+        (bfs_path, _, _, bfs_explored), *_ = BFS(
+            *search_args(solver), use_push_level=True
+        ).search()
+
+        assert replay(solver, path) == (solver.switches_pos, weight)
+        assert sum(map(str.isupper, path)) == sum(map(str.isupper, bfs_path))
+        assert explored < bfs_explored
+
+
+def test_search_budget():
+    budget = SearchBudget(max_expanded=10)
+    assert not budget.exhausted(9, 100) and budget.exhausted(10, 100)
+    assert budget.exceeded == BudgetLimit.EXPANDED and budget.exhausted(0, 0)
+
+    budget.start()
+    assert budget.exceeded is None and not budget.exhausted(0, 0)
+
+    solver = load_solver(8)
+    (path, _, expanded, explored), *_ = BFS(
+        *search_args(solver), budget=SearchBudget(max_expanded=50)
+    ).search()
+    assert BudgetLimit.from_label(path) == BudgetLimit.EXPANDED
+    assert expanded == 50 and explored > 50
+
+    # every algorithm stops on the first check and tells why
+    results = solver.searching(list(Algorithm), budget=SearchBudget(max_states=1))
+    assert len(results) == len(Algorithm)
+    for (path, weight, _, _), *_ in results.values():
+        assert (BudgetLimit.from_label(path), weight) == (BudgetLimit.STATES, 0)
+
+    assert BudgetLimit.from_label("Impossible") is None
+
+
+def test_parallel_portfolio():
+    solver = load_solver(3)
+    algos = [Algorithm.BFS, Algorithm.UCS, Algorithm.ASTAR, Algorithm.BIDIRECTIONAL]
+    budgets = {Algorithm.UCS: SearchBudget(max_expanded=10)}
+
+    results = solver.searching(algos, budgets=budgets)
+    parallel = solver.searching(algos, parallel=True, budgets=budgets)
+
+    # same results in the same order, only run concurrently
+    assert list(parallel) == list(results)
+    for key, ((path, weight, expanded, explored), *metrics) in parallel.items():
+        assert (path, weight, expanded, explored) == results[key][0]
+        assert len(metrics) == 3
+    assert BudgetLimit.from_label(parallel["UCS"][0][0]) == BudgetLimit.EXPANDED
+
+    first = solver.searching(algos, parallel=True, first_wins=True)
+    solutions = [result for result in first.values() if is_solution(result)]
+    assert len(solutions) == 1
+
+    (path, weight, _, _), *_ = solutions[0]
+    assert replay(solver, path) == (solver.switches_pos, weight)
+
+    # a search running processes of its own can be a worker of the portfolio
+    algos = [Algorithm.ASTAR, Algorithm.HDASTAR]
+    parallel = solver.searching(algos, parallel=True)
+    assert list(parallel) == ["A*", "HDA*"]
+    costs = []
+    for (path, weight, _, _), *_ in parallel.values():
+        assert replay(solver, path) == (solver.switches_pos, weight)
+        costs.append(len(path) - sum(map(str.isupper, path)) + weight)
+    assert costs[0] == costs[1]
+
+
+def test_batch_selection():
+    assert select_levels(["3", "input-1[01].txt"]) == [
+        "input-03.txt",
+        "input-10.txt",
+        "input-11.txt",
+    ]
+    assert len(select_levels([])) == len(get_input_filenames())
+    assert output_filename("input-07.txt") == "output-07.txt"
+
+    blocks = read_blocks("output-01.txt")
+    assert blocks["BFS"].splitlines()[2] == "uLulDrrRRRRRRurD"
+    assert all(map(is_done, blocks.values()))
+    assert not is_done("A*\nSteps: 7, Weight: 0, Node: 9\nTimeout")
+
+
+def test_batch_runner(tmp_path, monkeypatch):
+    monkeypatch.setattr("core.batch.OUTPUT_DIR", str(tmp_path))
+    algos = [Algorithm.BFS, Algorithm.ASTAR]
+
+    results = list(run_batch(["2", "3"], algos))
+    assert sorted(result[:2] for result in results) == [
+        ("input-02.txt", "A*"),
+        ("input-02.txt", "BFS"),
+        ("input-03.txt", "A*"),
+        ("input-03.txt", "BFS"),
+    ]
+    assert all(block and error is None for *_, block, error in results)
+    assert sorted(os.listdir(tmp_path)) == ["output-02.txt", "output-03.txt"]
+
+    # blocks are written in the order of the algorithms, whatever their order
+    blocks = read_blocks("output-02.txt")
+    write_blocks("output-02.txt", dict(reversed(blocks.items())))
+    assert list(read_blocks("output-02.txt")) == ["BFS", "A*"]
+    assert read_blocks("output-02.txt") == blocks
+    assert sorted(os.listdir(tmp_path)) == ["output-02.txt", "output-03.txt"]
+
+    assert is_fresh("input-02.txt", "output-02.txt")
+    assert not is_fresh("input-04.txt", "output-04.txt")
+    os.utime(tmp_path / "output-03.txt", (0, 0))
+    assert not is_fresh("input-03.txt", "output-03.txt")
+
+    # resume skips the blocks done in fresh files only, and reruns cut short ones
+    blocks["A*"] = "A*\nSteps: 7, Weight: 0, Node: 9\nTimeout"
+    write_blocks("output-02.txt", blocks)
+    assert not is_done(read_blocks("output-02.txt")["A*"])
+
+    resumed = list(run_batch(["2", "3"], algos, jobs=2, resume=True))
+    assert sorted(result[:2] for result in resumed) == [
+        ("input-02.txt", "A*"),
+        ("input-03.txt", "A*"),
+        ("input-03.txt", "BFS"),
+    ]
+    assert all(map(is_done, read_blocks("output-02.txt").values()))
+    assert list(run_batch(["2", "3"], algos, resume=True)) == []
+
+    # an error in a search stops the batch, unreadable levels are only reported
+    with pytest.raises(AttributeError):
+        list(run_batch(["2", "3"], algos, jobs=2, budgets={Algorithm.BFS: "none"}))
+
+    monkeypatch.setattr("core.batch.INPUT_DIR", str(tmp_path))
+    ((_, _, block, error),) = run_batch(["2"], [Algorithm.BFS])
+    assert block is None and error.startswith("FileNotFoundError")